@@ -3,18 +3,46 @@
 # Author: Arrow Lyu
 # Date: 2025/06/26
 # Description:
-#   - Automatically creates controls for a joint chain.
-#   - Skips the last (end) joint from control creation.
-#   - Controls are constrained to joints and organized hierarchically.
+#   - Automatically creates controls for a joint chain or a branching joint hierarchy.
+#   - Skips the last (end) joint of every branch from control creation.
+#   - Controls are constrained to joints and organized hierarchically,
+#     each group is parented under its parent joint's control (joint -> parent map).
 # Usage:
 #   - Select the root joint and run.
 # ================================
 
 
 import maya.cmds as cmds
-
-# Create the main function of the controller chain: create controls for selected joint chain
-def create_controls_from_joint_chain(radius=3.0, axis='Y', name_prefix='ctrl'):
+import maya.mel as mel
+import maya.api.OpenMaya as om
+import time
+
+# Every joint under root (root first) and a joint -> parent joint map, from one listRelatives query:
+# the parent is read off the full path, skipping any non-joint transforms in between
+def joint_parent_map(root_joint):
+    all_joints = [root_joint] + (cmds.listRelatives(root_joint, ad=True, type='joint', f=True) or [])
+    joint_set = set(all_joints)
+    parent_map = {}
+    for joint in all_joints[1:]:
+        parent = joint.rsplit('|', 1)[0]
+        while parent not in joint_set:
+            parent = parent.rsplit('|', 1)[0]
+        parent_map[joint] = parent
+    return all_joints, parent_map
+
+# World positions of many joints through the API, no xform call per joint
+def joint_world_positions(joints):
+    sel = om.MSelectionList()
+    for joint in joints:
+        sel.add(joint)
+    positions = []
+    for i in range(sel.length()):
+        matrix = sel.getDagPath(i).inclusiveMatrix()
+        positions.append((matrix[12], matrix[13], matrix[14]))
+    return positions
+
+# Create the main function of the controller chain: create controls for the selected joint hierarchy
+def create_controls_from_joint_chain(radius=3.0, axis='Y', name_prefix='ctrl', chunk_size=2000):
     
     if not cmds.ls(sl=True, type='joint'):
         cmds.warning("Please select the root joint.")
@@ -26,39 +54,77 @@ def create_controls_from_joint_chain(radius=3.0, axis='Y', name_prefix='ctrl'):
         cmds.warning("Invalid axis. Use 'X', 'Y', or 'Z'.")
         return
     orient = axis_dict[axis]
+    start = time.perf_counter()
 
-    # Get full joint chain
-    root_joint = cmds.ls(sl=True, l=True)[0]
-    all_joints = cmds.listRelatives(root_joint, ad=True, type='joint', f=True) or []
-    all_joints.append(root_joint)
-    all_joints.reverse()
+    # Get the whole hierarchy and its parent map in one traversal
+    root_joint = cmds.ls(sl=True, l=True, type='joint')[0]
+    all_joints, parent_map = joint_parent_map(root_joint)
 
-    if len(all_joints) < 2:
+    # skip the end joint of every branch
+    has_children = set(parent_map.values())
+    joints_to_rig = [joint for joint in all_joints if joint in has_children]
+    if not joints_to_rig:
         cmds.warning("Joint chain too short to skip end joint.")
         return
+    positions = joint_world_positions(joints_to_rig)
 
-    joints_to_rig = all_joints[:-1]  # skip end joint
-    ctrl_list = []
-
-    for joint in joints_to_rig:
-        pos = cmds.xform(joint, q=True, ws=True, t=True)
-        short_name = joint.split('|')[-1]
-        ctrl_name = f"{name_prefix}_{short_name}_CTRL"
-        grp_name = f"{ctrl_name}_GRP"
-
-        ctrl = cmds.circle(n=ctrl_name, nr=orient, r=radius)[0]
-        grp = cmds.group(ctrl, n=grp_name)
-        cmds.xform(grp, ws=True, t=pos)
-        cmds.makeIdentity(ctrl, apply=True, t=1, r=1, s=1, n=0)
-        cmds.parentConstraint(ctrl, joint, mo=True)
+    ctrl_map = {}
+    cmds.undoInfo(openChunk=True, chunkName='DoControl_create')
+    cmds.refresh(suspend=True)
+    try:
+        # controls and groups, everything stays at world level until the constraints are in
+        for joint in joints_to_rig:
+            short_name = joint.split('|')[-1]
+            ctrl_name = f"{name_prefix}_{short_name}_CTRL"
+            ctrl = cmds.circle(n=ctrl_name, nr=orient, r=radius, ch=False)[0]
+            grp = cmds.group(ctrl, n=f"{ctrl_name}_GRP")
+            grp = grp if grp.startswith('|') else '|' + grp
+            ctrl_map[joint] = (grp + '|' + ctrl.split('|')[-1], grp)
+
+        # place the groups and constrain the joints as batched MEL
+        for begin in range(0, len(joints_to_rig), chunk_size):
+            commands = []
+            for joint, pos in zip(joints_to_rig[begin:begin + chunk_size], positions[begin:begin + chunk_size]):
+                ctrl, grp = ctrl_map[joint]
+                commands.append(f'setAttr "{grp}.translate" {pos[0]!r} {pos[1]!r} {pos[2]!r}; parentConstraint -mo "{ctrl}" "{joint}";')
+            mel.eval(''.join(commands))
+
+        # parent every group under its parent joint's control, top down, one call per parent control
+        children = {}
+        for joint in joints_to_rig[1:]:
+            children.setdefault(parent_map[joint], []).append(joint)
+        queue = [root_joint]
+        for parent in queue:
+            kids = children.get(parent, [])
+            if not kids:
+                continue
+            parent_ctrl = ctrl_map[parent][0]
+            new_grps = cmds.ls(cmds.parent([ctrl_map[kid][1] for kid in kids], parent_ctrl), long=True)
+            for kid, grp in zip(kids, new_grps):
+                ctrl_map[kid] = (grp + '|' + ctrl_map[kid][0].split('|')[-1], grp)
+            queue += kids
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
 
-        ctrl_list.append((ctrl, grp))
+    cmds.select(clear=True)
+    print(f"✅ {len(ctrl_map)} FK controls created in {time.perf_counter() - start:.3f} s. End joints skipped.")
+    return ctrl_map
 
-    for i in range(len(ctrl_list) - 1):
-        cmds.parent(ctrl_list[i + 1][1], ctrl_list[i][0])
 
+# Time the builder on a generated hierarchy: a root with branches chains of length joints each
+def benchmark_controls(branches=10, length=100):
     cmds.select(clear=True)
-    print("✅ FK controls created. End joint skipped.")
+    root = cmds.joint(p=(0, 0, 0))
+    for b in range(branches):
+        cmds.select(root)
+        for i in range(1, length + 1):
+            cmds.joint(p=(b * 2.0, i * 1.0, 0))
+    cmds.select(root)
+    start = time.perf_counter()
+    ctrl_map = create_controls_from_joint_chain(name_prefix='bench')
+    print(f"{branches * length + 1} joints: {len(ctrl_map)} controls in {time.perf_counter() - start:.3f} s")
+    cmds.delete(ctrl_map[cmds.ls(root, l=True)[0]][1], root)
 
 
 # Get value from UI and execute function when button is clicked
@@ -6,6 +6,14 @@
 #   - Creates a preview polyCube with user-defined size and subdivisions.
 #   - Applies a height map (alpha texture) as a displacement on the cube.
 #   - Allows easy deletion of the preview geometry.
+#   - Direct mode samples the height map with NumPy and writes the points in one call.
+#   - Decoded maps are kept in a size-capped LRU cache (optionally spilled to a capped .npy folder).
+#   - Auto LOD picks subdivisions from map resolution, screen size and a poly budget.
+#   - Raw, TIFF and EXR maps too big to decode are memory-mapped and sampled tile by tile.
+#   - Bake turns the preview into an adaptive quadtree mesh within a max vertical error.
+#   - Contact sheet previews the whole alpha pack as a grid of small displaced tiles.
+#   - An incremental alpha pack index keeps per-map stats and thumbnails for search,
+#     warnings and auto-normalized strength.
 # Usage:
 #   - Make sure you have your texture files under "sourceimages/Alpha_Pack/".
 #   - Select the object, input the file name and then cilck apply.
@@ -13,7 +21,31 @@
 
 import maya.cmds as cmds
 import maya.mel as mel
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaUI as omui
+import maya.OpenMaya as om1
+import numpy as np
+# Qt ships with Maya, its QImage decodes the contact sheet on worker threads
+try:
+    from PySide6.QtGui import QImage
+except ImportError:
+    try:
+        from PySide2.QtGui import QImage
+    except ImportError:
+        QImage = None
+import base64
+import ctypes
+import fnmatch
+import hashlib
+import json
+import os
 import random
+import struct
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 # create main window
 def ui():
@@ -41,7 +73,13 @@ def ui():
     cmds.textField('sub_height_input', h=30)
     cmds.text('Subdivision Depth', h=20)
     cmds.textField('sub_depth_input', h=30)
+    # automatic level of detail, ignores the subdivision fields above
+    cmds.checkBox('auto_lod_check', label='Auto LOD (map size, screen size, poly budget)', value=False)
+    cmds.text('Poly Budget', h=20)
+    cmds.textField('poly_budget_input', h=30, text='200000')
     cmds.button('Create Test Cube', c='create_shape()', h=40, bgc=[0.6,0.5,0.9])
+    cmds.button('Refine LOD', c='auto_lod()', h=30)
+    cmds.text('lod_report', label='')
     
     
     cmds.separator(height=10)
@@ -50,6 +88,8 @@ def ui():
     cmds.frameLayout( label='2. File Name of Your Alapha Texture' )
     cmds.text('(example: moon.jpg)')
     cmds.textField('my_file_name_input', text=True, vis=True, h=30, sbm='File Name: Input file name of a texture')
+    cmds.checkBox('direct_displace_check', label='Direct Displacement (NumPy, no deformer nodes)', value=False)
+    cmds.checkBox('auto_normalize_check', label='Auto Normalize Strength (from pack index)', value=False)
     cmds.button('Apply Alpha', c='texture_deform()', h=40, bgc=[0.2,0.5,0.7])
     
 
@@ -58,6 +98,33 @@ def ui():
     # clear test
     cmds.frameLayout( label='3. Delete Test PolyCube' )
     cmds.button('Delete', c='clear()', h=40, bgc=[0.1,0.7,0.5])
+
+    cmds.separator(height=10)
+
+    # whole pack at once
+    cmds.frameLayout( label='4. Contact Sheet of the Whole Alpha Pack' )
+    cmds.button('Preview Alpha Pack', c='contact_sheet()', h=40, bgc=[0.7,0.5,0.2])
+    cmds.button('Delete Contact Sheet', c='clear_contact_sheet()', h=30)
+
+    cmds.separator(height=10)
+
+    # search the pack through its index, the full size maps are never opened
+    cmds.frameLayout( label='5. Search the Alpha Pack' )
+    cmds.textField('alpha_search_input', h=30, sbm='Search: part of a file name')
+    cmds.optionMenu('alpha_sort_menu', label='Sort by')
+    for sort_key in ('name', 'resolution', 'bit_depth', 'range', 'mean'):
+        cmds.menuItem(label=sort_key)
+    cmds.button('Update Index', c='build_alpha_index()', h=30)
+    cmds.button('Search', c='show_alpha_search()', h=30)
+    cmds.textScrollList('alpha_search_list', h=120, sc='pick_alpha_search()')
+
+    cmds.separator(height=10)
+
+    # bake the previewed map into a decimated mesh
+    cmds.frameLayout( label='6. Bake Preview to Geometry' )
+    cmds.text('Max Vertical Error', h=20)
+    cmds.textField('bake_error_input', h=30, text='0.01')
+    cmds.button('Bake', c='bake_preview()', h=40, bgc=[0.5,0.7,0.3])
     
     # create window "win"
     cmds.showWindow(win)
@@ -76,6 +143,10 @@ def create_shape():
     cmds.setAttr('%s.scaleX' %my_name, scale_x)
     cmds.setAttr('%s.scaleZ' %my_name, scale_z)
     cmds.setAttr('%s.scaleY' %my_name, scale_y)   
+    # let auto LOD pick and refine the subdivisions
+    if cmds.checkBox('auto_lod_check', q=True, value=True):
+        auto_lod()
+        return
     # set sub division
     sub_width = int(cmds.textField('sub_width_input', q=True, text=True))
     sub_height = int(cmds.textField('sub_height_input', q=True, text=True))
@@ -90,6 +161,77 @@ def create_shape():
     cmds.setAttr(my_subdepth, sub_depth)
     
 
+###################################################################################################
+# auto LOD: pick subdivisions instead of typing them, and refine land in place coarse to fine
+
+# projected size of an object in the active viewport, in pixels
+def screen_size(my_name):
+    try:
+        view = omui.M3dView.active3dView()
+    except RuntimeError:
+        return 1000
+    x_min, y_min, z_min, x_max, y_max, z_max = cmds.exactWorldBoundingBox(my_name)
+    xs, ys = [], []
+    for x in (x_min, x_max):
+        for y in (y_min, y_max):
+            for z in (z_min, z_max):
+                view_x, view_y = view.worldToView(om.MPoint(x, y, z))[:2]
+                xs.append(view_x)
+                ys.append(view_y)
+    width = min(max(xs), view.portWidth()) - max(min(xs), 0)
+    height = min(max(ys), view.portHeight()) - max(min(ys), 0)
+    return max(width, height, 1)
+
+# subdivisions (width, depth) for a map size, screen size and poly budget
+def pick_lod(map_cols, map_rows, pixels, poly_budget, aspect):
+    # more than one quad per texel, or per two screen pixels, shows nothing new
+    sub_width = min(map_cols, pixels / 2.0 * min(aspect, 1.0))
+    sub_depth = min(map_rows, pixels / 2.0 * min(1.0 / aspect, 1.0))
+    # top and bottom caps hold almost every face of the cube
+    fit = min(1.0, np.sqrt(poly_budget / max(2.0 * sub_width * sub_depth, 1.0)))
+    return max(1, int(sub_width * fit)), max(1, int(sub_depth * fit))
+
+# pick the LOD for land and get there coarse first, each level is shown before the next
+def auto_lod():
+    my_name = 'land'
+    if not cmds.objExists(my_name):
+        cmds.warning('Create the test cube first.')
+        return
+    start = time.perf_counter()
+    my_history = cmds.listHistory(my_name)[-1]
+
+    # map resolution, when a map is already picked
+    my_file_name = cmds.textField('my_file_name_input', q=True, text=True)
+    map_rows, map_cols = 1024, 1024
+    if my_file_name and os.path.isfile(alpha_path(my_file_name)):
+        map_rows, map_cols = height_source(alpha_path(my_file_name)).shape
+    poly_budget = int(cmds.textField('poly_budget_input', q=True, text=True) or 200000)
+    aspect = abs(cmds.getAttr(my_name + '.scaleX')) / max(abs(cmds.getAttr(my_name + '.scaleZ')), 1e-6)
+    sub_width, sub_depth = pick_lod(map_cols, map_rows, screen_size(my_name), poly_budget, aspect)
+
+    # coarse to fine: 1/8, 1/4, 1/2 and full, always on the same polyCube node
+    direct = cmds.checkBox('direct_displace_check', q=True, value=True) and my_file_name
+    levels = []
+    for step in (8, 4, 2, 1):
+        level = (max(1, sub_width // step), max(1, sub_depth // step))
+        if level not in levels:
+            levels.append(level)
+    if direct:
+        # same strength / offset as Apply, so Auto Normalize survives a Refine LOD
+        strength, offset = alpha_strength(my_file_name, warn=False)
+    for level_width, level_depth in levels:
+        if direct:
+            clear_tweaks(my_name)
+        cmds.setAttr(my_history + '.subdivisionsWidth', level_width)
+        cmds.setAttr(my_history + '.subdivisionsDepth', level_depth)
+        if direct and os.path.isfile(alpha_path(my_file_name)):
+            displace_mesh(my_name, height_source(alpha_path(my_file_name)), strength, offset)
+        cmds.refresh()
+
+    report = f'LOD {sub_width} x {sub_depth} in {time.perf_counter() - start:.3f} s'
+    cmds.text('lod_report', e=True, label=report)
+    print(report)
+
 def clear():
     # delete test object
     cmds.delete('land')
@@ -97,8 +239,36 @@ def clear():
 def texture_deform():
     # user input
     my_file_name = cmds.textField('my_file_name_input', q=True, text=True)
+    strength, offset = alpha_strength(my_file_name)
+    # direct mode: no deformer network, just displaced points
+    if cmds.checkBox('direct_displace_check', q=True, value=True):
+        mesh = (cmds.ls(sl=True) or ['land'])[0]
+        displace_mesh(mesh, height_source(alpha_path(my_file_name)), strength, offset)
+        return
+    texture_deformer('sourceimages/alpha_pack/' + my_file_name, strength, offset)
+
+# strength and offset for a map: 1 and 0, or stretched to its full range by Auto Normalize,
+# with warnings about flat, low range and 8-bit maps from its index entry
+def alpha_strength(my_file_name, warn=True):
+    strength, offset = 1.0, 0.0
+    entry = alpha_index_entry(my_file_name)
+    if entry:
+        value_range = entry['max'] - entry['min']
+        normalize = cmds.checkBox('auto_normalize_check', q=True, value=True)
+        if warn and value_range < 1e-3:
+            cmds.warning(f'{my_file_name} is empty (flat at {entry["min"]:.3f}).')
+        elif warn and value_range < 0.1 and not normalize:
+            cmds.warning(f'{my_file_name} only uses {value_range:.3f} of its range, try Auto Normalize.')
+        if warn and entry['bit_depth'] == 8:
+            print(f'{my_file_name} is 8-bit, strong displacement will show steps.')
+        if normalize and value_range >= 1e-3:
+            strength = 1.0 / value_range
+            offset = -entry['min'] * strength
+    return strength, offset
+
+def texture_deformer(my_file_adress, strength=1, offset=0):
     # create texture deformer
-    my_deformer = cmds.textureDeformer(envelope=1, strength=1, offset=0, vectorStrength=(1, 1, 1), vectorOffset=(0, 0, 0), vectorSpace="Object" ,direction="Handle", pointSpace="UV", exclusive="")
+    my_deformer = cmds.textureDeformer(envelope=1, strength=strength, offset=offset, vectorStrength=(1, 1, 1), vectorOffset=(0, 0, 0), vectorSpace="Object" ,direction="Handle", pointSpace="UV", exclusive="")
     # create new shader node
     my_shader = 'ha_shader'
     shader=cmds.shadingNode('lambert',asShader=True, n=my_shader)
@@ -107,10 +277,953 @@ def texture_deform():
     # create shading node
     fileNode2d = cmds.shadingNode('place2dTexture', asUtility=True)
     # apply texture
-    my_file_adress = ('sourceimages/alpha_pack/' + my_file_name)
     shading_group = cmds.sets(renderable=True,noSurfaceShader=True,empty=True)
     cmds.setAttr( '%s.fileTextureName'%fileNode, my_file_adress, type = 'string')
     # link file node to texture deformer
-    cmds.connectAttr(fileNode + '.outColor', 'textureDeformer1' + '.texture', f=True)
+    cmds.connectAttr(fileNode + '.outColor', my_deformer[0] + '.texture', f=True)
+    return my_deformer[0]
+
+###################################################################################################
+# direct displacement: decode the map once, sample it in NumPy, write all points back in one call
+
+# full path of a map inside the project's alpha pack
+def alpha_path(my_file_name):
+    return os.path.join(cmds.workspace(q=True, rootDirectory=True), 'sourceimages', 'alpha_pack', my_file_name)
+
+# decode an image with MImage into a float array of heights (0-1), row 0 is v = 0
+def load_height_map(path):
+    image = om1.MImage()
+    image.readFromFile(path, om1.MImage.kFloat)
+    width_util, height_util = om1.MScriptUtil(), om1.MScriptUtil()
+    width_ptr, height_ptr = width_util.asUintPtr(), height_util.asUintPtr()
+    image.getSize(width_ptr, height_ptr)
+    width = om1.MScriptUtil.getUint(width_ptr)
+    height = om1.MScriptUtil.getUint(height_ptr)
+    buffer = (ctypes.c_float * (width * height * 4)).from_address(int(image.floatPixels()))
+    # copy the red channel out before MImage frees its pixels
+    return np.frombuffer(buffer, dtype=np.float32).reshape(height, width, 4)[..., 0].copy()
+
+# decoded maps, least recently used first, keyed by (absolute path, mtime, file size)
+height_cache = OrderedDict()
+# bytes of decoded maps kept in memory, older maps are evicted past this
+height_cache_limit = 1024 * 1024 * 1024
+# folder evicted maps are saved to as .npy and memory-mapped back from on the next use.
+# Off (None) by default, every spill writes the whole float map during the click that evicts it;
+# e.g. height_cache_spill = os.path.join(tempfile.gettempdir(), 'HeightPreview_cache')
+height_cache_spill = None
+# bytes of .npy spills kept on disk, the least recently used files are deleted past this
+height_cache_spill_limit = 4 * 1024 * 1024 * 1024
+
+# spill file of one cache key, named by path first so every version of a map can be found
+def spill_path(key):
+    if not height_cache_spill:
+        return None
+    path_hash = hashlib.sha1(key[0].encode()).hexdigest()[:16]
+    return os.path.join(height_cache_spill, f'{path_hash}_{hashlib.sha1(repr(key).encode()).hexdigest()[:16]}.npy')
+
+# delete the spills of older versions of an edited map
+def remove_stale_spills(key):
+    spill = spill_path(key)
+    if not spill or not os.path.isdir(height_cache_spill):
+        return
+    prefix = os.path.basename(spill).split('_')[0] + '_'
+    for name in os.listdir(height_cache_spill):
+        if name.startswith(prefix) and name != os.path.basename(spill):
+            try:
+                os.remove(os.path.join(height_cache_spill, name))
+            except OSError:
+                pass
+
+# keep the spill folder under its byte cap, least recently used files go first;
+# files still memory-mapped by the cache are kept
+def trim_spills():
+    if not height_cache_spill or not os.path.isdir(height_cache_spill):
+        return
+    in_use = {spill_path(key) for key, heights in height_cache.items() if isinstance(heights, np.memmap)}
+    files = [os.path.join(height_cache_spill, name) for name in os.listdir(height_cache_spill) if name.endswith('.npy')]
+    files.sort(key=lambda f: os.stat(f).st_atime)
+    total = sum(os.path.getsize(f) for f in files)
+    for f in files:
+        if total <= height_cache_spill_limit:
+            break
+        if f in in_use:
+            continue
+        size = os.path.getsize(f)
+        try:
+            os.remove(f)
+            total -= size
+        except OSError:
+            pass
+
+# memory held by the cache, memory-mapped spills count too so the cache never grows without bound
+def height_cache_bytes():
+    return sum(heights.nbytes for heights in height_cache.values())
+
+# decoded heights of a map, only decoded again when the file changed
+def cached_height_map(path):
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key in height_cache:
+        height_cache.move_to_end(key)
+        return height_cache[key]
+
+    # an edited file makes its older entries (and their spills) useless
+    for stale in [k for k in height_cache if k[0] == path]:
+        del height_cache[stale]
+    remove_stale_spills(key)
+
+    spill = spill_path(key)
+    if spill and os.path.exists(spill):
+        heights = np.load(spill, mmap_mode='r')
+    else:
+        heights = load_height_map(path)
+    height_cache[key] = heights
+
+    # evict the least recently used maps until the cache fits again
+    spilled = False
+    while len(height_cache) > 1 and height_cache_bytes() > height_cache_limit:
+        old_key, old_heights = height_cache.popitem(last=False)
+        old_spill = spill_path(old_key)
+        if old_spill and not isinstance(old_heights, np.memmap) and not os.path.exists(old_spill):
+            os.makedirs(height_cache_spill, exist_ok=True)
+            np.save(old_spill, old_heights)
+            spilled = True
+    if spilled:
+        trim_spills()
+    return heights
+
+# bilinear lookup of the map at every (u, v), wrapping like a repeating texture
+def sample_bilinear(heights, uv):
+    rows, cols = heights.shape
+    x = (uv[:, 0] % 1.0) * cols - 0.5
+    y = (uv[:, 1] % 1.0) * rows - 0.5
+    x0, y0 = np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+    fx, fy = x - x0, y - y0
+    x0, x1 = x0 % cols, (x0 + 1) % cols
+    y0, y1 = y0 % rows, (y0 + 1) % rows
+    top = heights[y0, x0] * (1.0 - fx) + heights[y0, x1] * fx
+    bottom = heights[y1, x0] * (1.0 - fx) + heights[y1, x1] * fx
+    return top * (1.0 - fy) + bottom * fy
+
+# undisplaced points of every previewed mesh, so a new map never stacks on the last one
+base_points = {}
+
+# mesh function set plus one uv per vertex
+def mesh_uvs(mesh):
+    sel = om.MSelectionList()
+    sel.add(mesh)
+    dag = sel.getDagPath(0)
+    dag.extendToShape()
+    fn = om.MFnMesh(dag)
+    us, vs = fn.getUVs()
+    _, uv_ids = fn.getAssignedUVs()
+    _, vertex_list = fn.getVertices()
+    vertex_uv = np.zeros((fn.numVertices, 2))
+    vertex_uv[np.array(vertex_list, dtype=np.int64)] = np.stack([us, vs], axis=1)[np.array(uv_ids, dtype=np.int64)]
+    return fn, vertex_uv
+
+# displace every vertex along object Y by strength * height + offset, same as the deformer path
+def displace_mesh(mesh, heights, strength=1.0, offset=0.0):
+    fn, vertex_uv = mesh_uvs(mesh)
+    key = fn.fullPathName()
+    if key not in base_points or len(base_points[key]) != fn.numVertices:
+        base_points[key] = np.array(fn.getPoints(om.MSpace.kObject))[:, :3]
+    points = base_points[key].copy()
+    points[:, 1] += strength * sample_heights(heights, vertex_uv) + offset
+    fn.setPoints(om.MPointArray(points.tolist()), om.MSpace.kObject)
+    return points
+
+# zero the tweaks setPoints leaves on a mesh with history and forget its saved points, so a new
+# subdivision starts from the clean polyCube output instead of old offsets on renumbered vertices
+def clear_tweaks(mesh):
+    shape = cmds.listRelatives(mesh, shapes=True, noIntermediate=True, fullPath=True)[0]
+    indices = cmds.getAttr(shape + '.pnts', multiIndices=True)
+    if indices:
+        last = max(indices)
+        cmds.setAttr(f'{shape}.pnts[0:{last}]', *([0.0] * 3 * (last + 1)))
+    base_points.pop(shape, None)
+
+# time the NumPy path against the textureDeformer path on growing cubes,
+# e.g. benchmark_displacement('moon.jpg')
+def benchmark_displacement(my_file_name, sizes=(50, 100, 250, 500, 1000)):
+    path = alpha_path(my_file_name)
+    heights = cached_height_map(path)
+    for size in sizes:
+        cube = cmds.polyCube(sd=size, sh=4, sw=size, n='bench_land')[0]
+        start = time.perf_counter()
+        displace_mesh(cube, heights)
+        numpy_time = time.perf_counter() - start
+        cmds.delete(cube)
+        base_points.clear()
+
+        cube = cmds.polyCube(sd=size, sh=4, sw=size, n='bench_land')[0]
+        cmds.select(cube)
+        start = time.perf_counter()
+        texture_deformer(path)
+        # pull the deformed points so the deformer really evaluates
+        mesh_uvs(cube)[0].getPoints(om.MSpace.kObject)
+        deformer_time = time.perf_counter() - start
+        cmds.delete(cube)
+
+        print(f"{size}x{size}: numpy {numpy_time:.3f} s, textureDeformer {deformer_time:.3f} s")
+
+###################################################################################################
+# bake: turn the previewed heightfield into an adaptive triangulation within a max vertical error
+
+# local corners, edge midpoints and center of a quadtree cell, (x, y) in cell units
+cell_vertices = np.array([(0, 0), (1, 0), (1, 1), (0, 1), (0.5, 0), (1, 0.5), (0.5, 1), (0, 0.5), (0.5, 0.5)])
+# cell sides as (corner, corner, midpoint), bit order of the split pattern: bottom, right, top, left
+cell_sides = ((0, 1, 4), (1, 2, 5), (2, 3, 6), (3, 0, 7))
+
+# triangles of a cell: two when no neighbor is finer, else a fan around the center through the midpoints
+def cell_triangles(pattern):
+    if not pattern:
+        return [(0, 1, 2), (0, 2, 3)]
+    triangles = []
+    for bit, (a, b, mid) in enumerate(cell_sides):
+        if pattern >> bit & 1:
+            triangles += [(a, mid, 8), (mid, b, 8)]
+        else:
+            triangles.append((a, b, 8))
+    return triangles
+
+# weights of the 9 cell vertices at every grid sample of a size x size cell, for one split pattern
+def cell_weights(size, pattern):
+    steps = np.arange(size + 1) / size
+    x, y = np.meshgrid(steps, steps)
+    x, y = x.ravel(), y.ravel()
+    weights = np.zeros((len(x), 9))
+    done = np.zeros(len(x), dtype=bool)
+    for a, b, c in cell_triangles(pattern):
+        (ax, ay), (bx, by), (cx, cy) = cell_vertices[[a, b, c]]
+        det = (by - cy) * (ax - cx) + (cx - bx) * (ay - cy)
+        wa = ((by - cy) * (x - cx) + (cx - bx) * (y - cy)) / det
+        wb = ((cy - ay) * (x - cx) + (ax - cx) * (y - cy)) / det
+        wc = 1.0 - wa - wb
+        inside = ~done & (wa >= -1e-9) & (wb >= -1e-9) & (wc >= -1e-9)
+        weights[inside, a], weights[inside, b], weights[inside, c] = wa[inside], wb[inside], wc[inside]
+        done |= inside
+    return weights
+
+# size of the leaf covering every grid cell
+def leaf_size_map(leaves, n):
+    size_map = np.zeros((n, n), dtype=np.int64)
+    for size, leaf in leaves.items():
+        size_map += np.repeat(np.repeat(leaf, size, axis=0), size, axis=1) * size
+    return size_map
+
+# smallest neighbor leaf on each side of every size x size cell, n + 1 past the border
+def neighbor_sizes(size_map, size):
+    n = len(size_map)
+    cells = n // size
+    outside = np.full((cells, 1), n + 1)
+    left = np.hstack([outside, size_map[:, size - 1:n - 1:size].reshape(cells, size, cells - 1).min(axis=1)]) if cells > 1 else outside
+    right = np.hstack([size_map[:, size:n:size].reshape(cells, size, cells - 1).min(axis=1), outside]) if cells > 1 else outside
+    bottom = np.vstack([outside.T, size_map[size - 1:n - 1:size].reshape(cells - 1, cells, size).min(axis=2)]) if cells > 1 else outside.T
+    top = np.vstack([size_map[size:n:size].reshape(cells - 1, cells, size).min(axis=2), outside.T]) if cells > 1 else outside.T
+    return bottom, right, top, left
+
+# max |height - triangulation| over the grid samples of some cells of one size and pattern
+def cell_errors(heights, size, pattern, rows, cols, chunk_samples=4 * 1024 * 1024):
+    weights = cell_weights(size, pattern)
+    steps = np.arange(size + 1)
+    corner_rows = (cell_vertices[:, 1] * size).astype(np.int64)
+    corner_cols = (cell_vertices[:, 0] * size).astype(np.int64)
+    errors = np.empty(len(rows))
+    chunk = max(1, chunk_samples // (size + 1) ** 2)
+    for start in range(0, len(rows), chunk):
+        r = rows[start:start + chunk, None] * size
+        c = cols[start:start + chunk, None] * size
+        block = heights[(r + steps)[:, :, None], (c + steps)[:, None, :]].reshape(len(r), -1)
+        corners = heights[r + corner_rows, c + corner_cols]
+        errors[start:start + chunk] = np.abs(block - corners @ weights.T).max(axis=1)
+    return errors
+
+# split pattern of every leaf of one size from its neighbors (a finer neighbor adds that midpoint)
+def leaf_patterns(size_map, size):
+    pattern = np.zeros((len(size_map) // size,) * 2, dtype=np.int64)
+    for bit, side in enumerate(neighbor_sizes(size_map, size)):
+        pattern |= (side < size).astype(np.int64) << bit
+    return pattern
+
+# quadtree of an (n + 1) x (n + 1) height grid, n a power of two, refined until every cell is
+# within max_error and neighbors differ by at most one level (so the midpoints close every crack)
+def build_quadtree(heights, max_error):
+    n = len(heights) - 1
+    leaves = {n: np.ones((1, 1), dtype=bool)}
+    errors, patterns = {}, {}
+    while True:
+        # balance first, a leaf next to one more than a level finer is split
+        while True:
+            size_map = leaf_size_map(leaves, n)
+            split = {size: leaf & (np.minimum.reduce(neighbor_sizes(size_map, size)) < size // 2)
+                     for size, leaf in leaves.items() if size > 2}
+            if not any(mask.any() for mask in split.values()):
+                break
+            leaves = split_leaves(leaves, split)
+        # only leaves that are new or got a new pattern are measured again
+        split = {}
+        for size, leaf in leaves.items():
+            pattern = leaf_patterns(size_map, size)
+            old_pattern = patterns.get(size, np.full(leaf.shape, -1))
+            error = errors.get(size, np.zeros(leaf.shape))
+            stale = leaf & (pattern != old_pattern)
+            for value in np.unique(pattern[stale]):
+                rows, cols = np.nonzero(stale & (pattern == value))
+                error[rows, cols] = cell_errors(heights, size, int(value), rows, cols)
+            patterns[size], errors[size] = np.where(leaf, pattern, -1), error
+            if size > 1:
+                split[size] = leaf & (error > max_error)
+        if not any(mask.any() for mask in split.values()):
+            return leaves, patterns, errors
+        leaves = split_leaves(leaves, split)
+
+# replace the masked leaves by their four children
+def split_leaves(leaves, split):
+    leaves = {size: leaf.copy() for size, leaf in leaves.items()}
+    for size, mask in split.items():
+        if not mask.any():
+            continue
+        leaves[size] &= ~mask
+        children = np.repeat(np.repeat(mask, 2, axis=0), 2, axis=1)
+        leaves[size // 2] = leaves.get(size // 2, np.zeros(children.shape, dtype=bool)) | children
+    return {size: leaf for size, leaf in leaves.items() if leaf.any()}
+
+# triangles of the finished quadtree as grid point indices (row * (n + 1) + col)
+def quadtree_triangles(leaves, patterns, n):
+    triangles = []
+    for size, leaf in leaves.items():
+        for value in np.unique(patterns[size][leaf]):
+            rows, cols = np.nonzero(leaf & (patterns[size] == value))
+            local = np.array(cell_triangles(int(value)))
+            point_rows = rows[:, None, None] * size + (cell_vertices[local, 1] * size).astype(np.int64)
+            point_cols = cols[:, None, None] * size + (cell_vertices[local, 0] * size).astype(np.int64)
+            triangles.append((point_rows * (n + 1) + point_cols).reshape(-1, 3))
+    return np.concatenate(triangles)
+
+# object space points of a mesh before any preview: the deformer's Orig shape, the points saved
+# before direct displacement, or the mesh itself when neither preview touched it
+def undeformed_points(fn):
+    transform = cmds.listRelatives(fn.fullPathName(), parent=True, fullPath=True)[0]
+    for shape in cmds.listRelatives(transform, shapes=True, fullPath=True, type='mesh') or []:
+        if cmds.getAttr(shape + '.intermediateObject') and cmds.polyEvaluate(shape, vertex=True) == fn.numVertices:
+            sel = om.MSelectionList()
+            sel.add(shape)
+            return np.array(om.MFnMesh(sel.getDagPath(0)).getPoints(om.MSpace.kObject))[:, :3]
+    points = base_points.get(fn.fullPathName())
+    if points is not None and len(points) == fn.numVertices:
+        return points
+    return np.array(fn.getPoints(om.MSpace.kObject))[:, :3]
+
+# bake land's previewed map into a decimated mesh, max_error is a world space vertical error
+def bake_preview(max_error=None, max_grid=1024):
+    my_name = 'land'
+    my_file_name = cmds.textField('my_file_name_input', q=True, text=True)
+    if not cmds.objExists(my_name) or not my_file_name:
+        cmds.warning('Create the test cube and pick a map first.')
+        return
+    if max_error is None:
+        max_error = float(cmds.textField('bake_error_input', q=True, text=True) or 0.01)
+    start = time.perf_counter()
+    heights_map = height_source(alpha_path(my_file_name))
+    strength, offset = alpha_strength(my_file_name, warn=False)
+
+    # top cap of the undisplaced cube: its uv square and the matching object space x / z
+    fn, vertex_uv = mesh_uvs(my_name)
+    points = undeformed_points(fn)
+    top = points[:, 1] >= points[:, 1].max() - 1e-6
+    uv_top = np.hstack([vertex_uv[top], np.ones((top.sum(), 1))])
+    uv_to_xz = np.linalg.lstsq(uv_top, points[top][:, [0, 2]], rcond=None)[0]
+    uv_min, uv_max = vertex_uv[top].min(axis=0), vertex_uv[top].max(axis=0)
+
+    # sample grid at the map's own density over that square, a power of two for the quadtree
+    map_rows, map_cols = heights_map.shape
+    texels = max((uv_max[0] - uv_min[0]) * map_cols, (uv_max[1] - uv_min[1]) * map_rows, 2)
+    n = 2 ** int(np.ceil(np.log2(min(texels, max_grid))))
+    steps = np.linspace(0.0, 1.0, n + 1)
+    u, v = np.meshgrid(uv_min[0] + steps * (uv_max[0] - uv_min[0]), uv_min[1] + steps * (uv_max[1] - uv_min[1]))
+    grid_uv = np.stack([u.ravel(), v.ravel()], axis=1)
+    heights = (strength * sample_heights(heights_map, grid_uv) + offset).reshape(n + 1, n + 1)
+
+    # vertical error is measured in object space, land's scale Y carries it to world space
+    scale_y = max(abs(cmds.getAttr(my_name + '.scaleY')), 1e-9)
+    leaves, patterns, errors = build_quadtree(heights, max_error / scale_y)
+    triangles = quadtree_triangles(leaves, patterns, n)
+
+    # keep only the grid points the triangles use
+    used, triangles = np.unique(triangles, return_inverse=True)
+    triangles = triangles.reshape(-1, 3)
+    used_uv = grid_uv[used]
+    xz = np.hstack([used_uv, np.ones((len(used), 1))]) @ uv_to_xz
+    mesh_points = np.stack([xz[:, 0], points[:, 1].max() + heights.ravel()[used], xz[:, 1]], axis=1)
+    # face +Y like the cap it replaces
+    a, b, c = (mesh_points[triangles[:, k]] for k in range(3))
+    if np.cross(b - a, c - a)[:, 1].sum() < 0:
+        triangles = triangles[:, ::-1]
+
+    baked_fn = om.MFnMesh()
+    counts = [3] * len(triangles)
+    connects = triangles.ravel().tolist()
+    baked = baked_fn.create(om.MPointArray(np.hstack([mesh_points, np.ones((len(used), 1))]).tolist()), counts, connects)
+    baked_fn.setUVs(used_uv[:, 0].tolist(), used_uv[:, 1].tolist())
+    baked_fn.assignUVs(counts, connects)
+    baked_name = cmds.rename(om.MFnDagNode(baked).fullPathName(), my_name + '_baked#')
+    cmds.sets(baked_name, e=True, forceElement='initialShadingGroup')
+    cmds.xform(baked_name, matrix=cmds.xform(my_name, q=True, matrix=True, worldSpace=True), worldSpace=True)
+
+    measured = max((errors[size][leaf].max() for size, leaf in leaves.items()), default=0.0) * scale_y
+    print(f'Bake: {len(triangles)} triangles (grid {2 * n * n}, {100.0 * len(triangles) / (2 * n * n):.1f}%), '
+          f'max error {measured:.5f} / {max_error:.5f}, {time.perf_counter() - start:.3f} s')
+    return baked_name
+
+###################################################################################################
+# streamed maps: memory-map raw / TIFF / EXR pixels and only build the mip tiles the preview samples
+
+# files above this many bytes are streamed instead of decoded whole
+stream_threshold = 64 * 1024 * 1024
+# headerless square terrain dumps, always streamed (MImage can't read them)
+raw_extensions = {'.raw': '<u2', '.r16': '<u2', '.r32': '<f4'}
+
+class TiledHeightMap:
+    # mip tiles of all levels kept around, least recently used are dropped past this
+    tile_cache_limit = 256 * 1024 * 1024
+
+    def __init__(self, path, tile_size=256, band_pixels=4 * 1024 * 1024):
+        self.path = path
+        self.tile_size = tile_size
+        self.band_pixels = band_pixels
+        self.tiles = OrderedDict()
+        self.tiff_tiles = None
+        extension = os.path.splitext(path)[1].lower()
+        if extension in raw_extensions:
+            self.open_raw(np.dtype(raw_extensions[extension]))
+        elif extension in ('.tif', '.tiff'):
+            self.open_tiff()
+        elif extension == '.exr':
+            self.open_exr()
+        else:
+            raise ValueError(f'{path}: only raw, TIFF and EXR maps can be streamed')
+        # integer pixels are scaled to 0-1 like MImage's float read
+        self.scale = 1.0 / np.iinfo(self.dtype).max if self.dtype.kind in 'ui' else 1.0
+        self.bit_depth = self.dtype.itemsize * 8
+        self.levels = max(0, int(np.ceil(np.log2(max(self.width, self.height) / tile_size)))) + 1
+
+    ### headerless square grid of one channel
+    def open_raw(self, dtype):
+        side = int(round(np.sqrt(os.path.getsize(self.path) / dtype.itemsize)))
+        if side * side * dtype.itemsize != os.path.getsize(self.path):
+            raise ValueError(f'{self.path}: raw maps must be square')
+        self.dtype, self.width, self.height = dtype, side, side
+        self.pixels = np.memmap(self.path, dtype=dtype, mode='r', shape=(side, side))
+
+    ### uncompressed, chunky TIFF, either one run of strips or tiles
+    def open_tiff(self):
+        with open(self.path, 'rb') as f:
+            head = f.read(8)
+            endian = '<' if head[:2] == b'II' else '>'
+            f.seek(struct.unpack(endian + 'I', head[4:8])[0])
+            tags = {}
+            for _ in range(struct.unpack(endian + 'H', f.read(2))[0]):
+                tag, kind, count, value = struct.unpack(endian + 'HHI4s', f.read(12))
+                size = {1: 1, 3: 2, 4: 4}.get(kind)
+                if size is None:
+                    continue
+                code = endian + str(count) + {1: 'B', 3: 'H', 4: 'I'}[kind]
+                if count * size <= 4:
+                    tags[tag] = struct.unpack(code, value[:count * size])
+                else:
+                    here = f.tell()
+                    f.seek(struct.unpack(endian + 'I', value)[0])
+                    tags[tag] = struct.unpack(code, f.read(count * size))
+                    f.seek(here)
+        if tags.get(259, (1,))[0] != 1 or tags.get(284, (1,))[0] != 1:
+            raise ValueError(f'{self.path}: only uncompressed, chunky TIFFs can be streamed')
+        self.width, self.height = tags[256][0], tags[257][0]
+        bits = tags.get(258, (1,))[0]
+        kind = {1: 'u', 2: 'i', 3: 'f'}[tags.get(339, (1,))[0]]
+        self.dtype = np.dtype(endian + kind + str(bits // 8))
+        channels = tags.get(277, (1,))[0]
+        if 324 in tags:
+            # tiled TIFF: one small memmap per stored tile, opened when a read touches it
+            self.tiff_tiles = (tags[322][0], tags[323][0], tags[324], channels)
+            return
+        offsets = tags[273]
+        strip_bytes = tags.get(278, (self.height,))[0] * self.width * channels * self.dtype.itemsize
+        if any(offset != offsets[0] + i * strip_bytes for i, offset in enumerate(offsets)):
+            raise ValueError(f'{self.path}: TIFF strips are not stored in one run')
+        self.pixels = np.memmap(self.path, dtype=self.dtype, mode='r', offset=offsets[0],
+                                shape=(self.height, self.width, channels))[..., 0]
+
+    ### uncompressed scanline EXR, every line is one fixed size record
+    def open_exr(self):
+        with open(self.path, 'rb') as f:
+            head = f.read(8)
+            if head[:4] != b'\x76\x2f\x31\x01' or struct.unpack('<i', head[4:])[0] & 0x1200:
+                raise ValueError(f'{self.path}: only single part scanline EXRs can be streamed')
+            channels, compression, window = [], None, None
+            while True:
+                name = b''
+                while not name.endswith(b'\x00'):
+                    name += f.read(1)
+                if name == b'\x00':
+                    break
+                while not f.read(1) == b'\x00':
+                    pass
+                value = f.read(struct.unpack('<i', f.read(4))[0])
+                if name == b'channels\x00':
+                    pos = 0
+                    while value[pos] != 0:
+                        end = value.index(b'\x00', pos)
+                        channels.append((value[pos:end].decode(), struct.unpack('<i', value[end + 1:end + 5])[0]))
+                        pos = end + 17
+                elif name == b'compression\x00':
+                    compression = value[0]
+                elif name == b'dataWindow\x00':
+                    window = struct.unpack('<4i', value)
+            if compression != 0:
+                raise ValueError(f'{self.path}: only uncompressed EXRs can be streamed')
+            self.width, self.height = window[2] - window[0] + 1, window[3] - window[1] + 1
+            line_offsets = np.fromfile(f, dtype='<u8', count=self.height)
+        # y, byte count, then each channel's whole line
+        fields = [('y', '<i4'), ('size', '<i4')]
+        for name, pixel_type in channels:
+            fields.append((name, {0: '<u4', 1: '<f2', 2: '<f4'}[pixel_type], (self.width,)))
+        record = np.dtype(fields)
+        if np.any(np.diff(line_offsets.astype(np.int64)) != record.itemsize):
+            raise ValueError(f'{self.path}: EXR lines are not stored in order')
+        names = [name for name, _ in channels]
+        channel = next((name for name in ('Y', 'R', 'Z', 'G') if name in names), names[0])
+        self.dtype = record[channel].base
+        self.pixels = np.memmap(self.path, dtype=record, mode='r', offset=int(line_offsets[0]),
+                                shape=(self.height,))[channel]
+
+    @property
+    def shape(self):
+        return self.height, self.width
+
+    ### source pixels of a rectangle, only the pages (or TIFF tiles) under it are touched.
+    ### Rows count up from the bottom like MImage's (v = 0 is row 0), the files store the top line first.
+    def read(self, row0, row1, col0, col1):
+        row0, row1 = self.height - row1, self.height - row0
+        if self.tiff_tiles is None:
+            return np.asarray(self.pixels[row0:row1, col0:col1][::-1], dtype=np.float32)
+        tile_width, tile_height, offsets, channels = self.tiff_tiles
+        across = -(-self.width // tile_width)
+        out = np.empty((row1 - row0, col1 - col0), dtype=np.float32)
+        for tile_row in range(row0 // tile_height, (row1 - 1) // tile_height + 1):
+            for tile_col in range(col0 // tile_width, (col1 - 1) // tile_width + 1):
+                tile = np.memmap(self.path, dtype=self.dtype, mode='r', offset=offsets[tile_row * across + tile_col],
+                                 shape=(tile_height, tile_width, channels))[..., 0]
+                top, left = tile_row * tile_height, tile_col * tile_width
+                r0, r1 = max(row0, top), min(row1, top + tile_height)
+                c0, c1 = max(col0, left), min(col1, left + tile_width)
+                out[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = tile[r0 - top:r1 - top, c0 - left:c1 - left]
+        return out[::-1]
+
+    ### size of a mip level, level 0 is the source
+    def level_shape(self, level):
+        factor = 2 ** level
+        return -(-self.height // factor), -(-self.width // factor)
+
+    ### one tile of a mip level, box filtered straight from the source in bounded row bands
+    def tile(self, level, tile_row, tile_col):
+        key = (level, tile_row, tile_col)
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            return self.tiles[key]
+        factor = 2 ** level
+        rows, cols = self.level_shape(level)
+        t = self.tile_size
+        r0, r1 = tile_row * t, min((tile_row + 1) * t, rows)
+        c0, c1 = tile_col * t, min((tile_col + 1) * t, cols)
+        src_c0, src_c1 = c0 * factor, min(c1 * factor, self.width)
+        band = max(1, self.band_pixels // max((src_c1 - src_c0) * factor, 1))
+        out = np.empty((r1 - r0, c1 - c0), dtype=np.float32)
+        for row in range(r0, r1, band):
+            row_end = min(row + band, r1)
+            block = self.read(row * factor, min(row_end * factor, self.height), src_c0, src_c1)
+            # edge pixels fill the last partial block
+            pad = ((0, (row_end - row) * factor - block.shape[0]), (0, (c1 - c0) * factor - block.shape[1]))
+            if pad[0][1] or pad[1][1]:
+                block = np.pad(block, pad, mode='edge')
+            out[row - r0:row_end - r0] = block.reshape(row_end - row, factor, c1 - c0, factor).mean(axis=(1, 3))
+        out *= self.scale
+        self.tiles[key] = out
+        while len(self.tiles) > 1 and sum(tile.nbytes for tile in self.tiles.values()) > self.tile_cache_limit:
+            self.tiles.popitem(last=False)
+        return out
+
+    ### heights at integer texel coordinates of a level, grouped so every tile is fetched once
+    def gather(self, level, rows, cols):
+        t = self.tile_size
+        across = -(-self.level_shape(level)[1] // t)
+        keys = (rows // t) * across + cols // t
+        order = np.argsort(keys, kind='stable')
+        unique_keys, starts = np.unique(keys[order], return_index=True)
+        out = np.empty(len(rows), dtype=np.float32)
+        for key, members in zip(unique_keys, np.split(order, starts[1:])):
+            tile_row, tile_col = divmod(int(key), across)
+            out[members] = self.tile(level, tile_row, tile_col)[rows[members] - tile_row * t, cols[members] - tile_col * t]
+        return out
+
+    ### coarsest level that still has a texel for every sample across the sampled uv span
+    def level_for(self, samples_across):
+        level = int(np.floor(np.log2(max(max(self.width, self.height) / max(samples_across, 1.0), 1.0))))
+        return min(level, self.levels - 1)
+
+    ### whole level as one array, only for small levels (stats, thumbnails)
+    def level_array(self, level):
+        rows, cols = self.level_shape(level)
+        grid_rows, grid_cols = np.meshgrid(np.arange(rows), np.arange(cols), indexing='ij')
+        return self.gather(level, grid_rows.ravel(), grid_cols.ravel()).reshape(rows, cols)
+
+    ### bilinear lookup at every (u, v) like sample_bilinear, on the level the uv density needs
+    def sample(self, uv):
+        span = max(np.ptp(uv[:, 0]), np.ptp(uv[:, 1]), 1e-6) if len(uv) else 1.0
+        level = self.level_for(np.sqrt(len(uv)) / min(span, 1.0))
+        rows, cols = self.level_shape(level)
+        x = (uv[:, 0] % 1.0) * cols - 0.5
+        y = (uv[:, 1] % 1.0) * rows - 0.5
+        x0, y0 = np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+        fx, fy = x - x0, y - y0
+        x0, x1 = x0 % cols, (x0 + 1) % cols
+        y0, y1 = y0 % rows, (y0 + 1) % rows
+        corners = self.gather(level, np.concatenate([y0, y0, y1, y1]), np.concatenate([x0, x1, x0, x1])).reshape(4, -1)
+        top = corners[0] * (1.0 - fx) + corners[1] * fx
+        bottom = corners[2] * (1.0 - fx) + corners[3] * fx
+        return top * (1.0 - fy) + bottom * fy
+
+# open streamed maps, keyed by (absolute path, mtime, file size)
+tiled_maps = {}
+
+# streamed reader for raw maps and big TIFF / EXR files, the LRU cached full decode for the rest
+def height_source(path):
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension in raw_extensions or (extension in ('.tif', '.tiff', '.exr') and stat.st_size > stream_threshold):
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if key not in tiled_maps:
+            for stale in [k for k in tiled_maps if k[0] == path]:
+                del tiled_maps[stale]
+            try:
+                tiled_maps[key] = TiledHeightMap(path)
+            except ValueError as error:
+                if extension in raw_extensions:
+                    raise
+                print(f'{error}, decoding it whole instead.')
+                return cached_height_map(path)
+        return tiled_maps[key]
+    return cached_height_map(path)
+
+# heights at every (u, v) of either a decoded array or a streamed map
+def sample_heights(heights, uv):
+    if isinstance(heights, TiledHeightMap):
+        return heights.sample(uv)
+    return sample_bilinear(heights, uv)
+
+# peak NumPy / Python allocations (MB) and seconds of one call, memory-mapped pages are not counted
+def measure_peak(call):
+    tracemalloc.start()
+    start = time.perf_counter()
+    call()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / (1024.0 * 1024.0), seconds
+
+# peak memory of a res x res preview from growing 16-bit raw maps, streamed vs decoded whole,
+# e.g. benchmark_streaming(sizes=(2048, 8192, 16384))
+def benchmark_streaming(sizes=(2048, 4096, 8192, 16384), res=512, compare_full=True):
+    grid = (np.arange(res) + 0.5) / res
+    u, v = np.meshgrid(grid, grid)
+    uv = np.stack([u.ravel(), v.ravel()], axis=1)
+    folder = tempfile.mkdtemp(prefix='HeightPreview_stream_')
+    for size in sizes:
+        # write a test map band by band so the benchmark itself stays small
+        path = os.path.join(folder, f'bench_{size}.r16')
+        pixels = np.memmap(path, dtype='<u2', mode='w+', shape=(size, size))
+        ramp = np.linspace(0, 65535, size).astype(np.uint16)
+        for row in range(0, size, 1024):
+            pixels[row:row + 1024] = ramp[None, :] // 2 + ramp[row:row + 1024, None] // 2
+        pixels.flush()
+        del pixels
+
+        streamed_peak, streamed_time = measure_peak(lambda: TiledHeightMap(path).sample(uv))
+        report = f'{size}x{size} ({os.path.getsize(path) / 1048576.0:.0f} MB): streamed {streamed_peak:.1f} MB peak, {streamed_time:.3f} s'
+        if compare_full:
+            full = lambda: sample_bilinear(np.fromfile(path, dtype='<u2').reshape(size, size) / 65535.0, uv)
+            full_peak, full_time = measure_peak(full)
+            report += f' | whole {full_peak:.1f} MB peak, {full_time:.3f} s'
+        print(report)
+        os.remove(path)
+    os.rmdir(folder)
+
+###################################################################################################
+# contact sheet: decode the whole pack on a thread pool and build one small tile per map
+
+# image files in the project's alpha pack, sorted by name
+def scan_alpha_pack():
+    folder = os.path.dirname(alpha_path(''))
+    if not os.path.isdir(folder):
+        return []
+    extensions = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.exr', '.tga', '.bmp', '.iff', '.raw', '.r16', '.r32')
+    return sorted(name for name in os.listdir(folder) if name.lower().endswith(extensions))
+
+# res x res resample of an already decoded map
+def decode_tile_from(heights, res):
+    grid = (np.arange(res) + 0.5) / res
+    u, v = np.meshgrid(grid, grid)
+    return sample_heights(heights, np.stack([u.ravel(), v.ravel()], axis=1)).reshape(res, res)
+
+# decode an image with Qt into heights like load_height_map (red channel, 0-1, row 0 is v = 0).
+# QImage is reentrant, so unlike MImage (not documented as thread safe) it can run on worker threads;
+# None when Qt has no reader for the format (EXR, IFF...)
+def qt_height_map(path):
+    if QImage is None:
+        return None
+    image = QImage(path)
+    if image.isNull():
+        return None
+    # 16 bit channels, so 16 bit maps keep their precision
+    image = image.convertToFormat(QImage.Format_RGBA64)
+    width, height = image.width(), image.height()
+    pixels = np.frombuffer(image.constBits(), dtype=np.uint16, count=image.bytesPerLine() * height // 2)
+    red = pixels.reshape(height, -1)[:, :width * 4:4]
+    # Qt stores the top row first, MImage the bottom one
+    return red[::-1].astype(np.float32) / 65535.0
+
+# shrink a map to a res x res tile on a worker thread: streamed (plain NumPy over memmapped files)
+# when TiledHeightMap can open it, else decoded by Qt; None for formats only MImage reads
+def worker_tile(path, res):
+    try:
+        return decode_tile_from(TiledHeightMap(path), res)
+    except ValueError:
+        pass
+    heights = qt_height_map(path)
+    return None if heights is None else decode_tile_from(heights, res)
+
+# lay out every map of the pack as displaced tiles, decoding overlaps with tile building:
+# at most max_in_flight maps are being decoded (and held in memory) at any time
+def contact_sheet(res=64, tile_size=10.0, gap=2.0, strength=2.0, workers=4, max_in_flight=8):
+    names = scan_alpha_pack()
+    if not names:
+        cmds.warning('No maps found in sourceimages/alpha_pack/.')
+        return
+    start = time.perf_counter()
+    clear_contact_sheet()
+    sheet = cmds.createNode('transform', name='alpha_contact_sheet')
+    columns = int(np.ceil(np.sqrt(len(names))))
+
+    cmds.progressWindow(title='Alpha Pack', progress=0, maxValue=len(names), status='Decoding maps', isInterruptable=True)
+    pending = {}
+    queue = list(enumerate(names))
+    done = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while queue or pending:
+                # keep the pool fed without going over the memory cap
+                while queue and len(pending) < max_in_flight:
+                    index, name = queue.pop(0)
+                    pending[pool.submit(worker_tile, alpha_path(name), res)] = (index, name)
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index, name = pending.pop(future)
+                    try:
+                        tile_heights = future.result()
+                        if tile_heights is None:
+                            # formats only MImage reads are decoded here while the pool keeps going
+                            tile_heights = decode_tile_from(load_height_map(alpha_path(name)), res)
+                    except RuntimeError:
+                        cmds.warning(f'Could not decode {name}, skipped.')
+                        continue
+                    # build the tile on the main thread while the other maps keep decoding
+                    row, column = divmod(index, columns)
+                    tile_name = 'tile_' + os.path.splitext(name)[0].replace('.', '_').replace(' ', '_')
+                    tile = cmds.polyPlane(w=tile_size, h=tile_size, sx=res - 1, sy=res - 1, n=tile_name)[0]
+                    cmds.xform(tile, t=(column * (tile_size + gap), 0, row * (tile_size + gap)))
+                    cmds.parent(tile, sheet)
+                    displace_mesh(tile, tile_heights, strength=strength)
+                    done += 1
+                    cmds.progressWindow(e=True, progress=done, status=f'{done} / {len(names)} maps')
+                if cmds.progressWindow(q=True, isCancelled=True):
+                    # cancelled futures never finish, drop them so result() is never called on them;
+                    # the ones already decoding are left to the pool shutdown and their tiles skipped
+                    queue = []
+                    for future in pending:
+                        future.cancel()
+                    pending = {}
+    finally:
+        cmds.progressWindow(endProgress=True)
+    print(f'Contact sheet: {done} maps in {time.perf_counter() - start:.3f} s')
+
+# delete the contact sheet tiles
+def clear_contact_sheet():
+    if cmds.objExists('alpha_contact_sheet'):
+        cmds.delete('alpha_contact_sheet')
+
+###################################################################################################
+# alpha pack index: per-map stats and a thumbnail, rescanned only for new or changed files
+
+# index file inside the pack folder
+def alpha_index_path():
+    return os.path.join(os.path.dirname(alpha_path('')), 'alpha_pack_index.json')
+
+# bits per channel read from the file header (PNG, TIFF, JPEG, EXR), None when unknown
+def file_bit_depth(path):
+    with open(path, 'rb') as f:
+        head = f.read(32)
+        if head[:8] == b'\x89PNG\r\n\x1a\n':
+            return head[24]
+        if head[:2] == b'\xff\xd8':
+            return 8
+        if head[:4] in (b'II*\x00', b'MM\x00*'):
+            endian = '<' if head[:2] == b'II' else '>'
+            f.seek(struct.unpack(endian + 'I', head[4:8])[0])
+            for _ in range(struct.unpack(endian + 'H', f.read(2))[0]):
+                tag, kind, count, value = struct.unpack(endian + 'HHI4s', f.read(12))
+                if tag == 258:
+                    if count > 2:
+                        f.seek(struct.unpack(endian + 'I', value)[0])
+                        value = f.read(2)
+                    return struct.unpack(endian + 'H', value[:2])[0]
+            return None
+        if head[:4] == b'\x76\x2f\x31\x01':
+            # walk the header attributes up to the channel list, pixel type 1 is half, 2 is float
+            f.seek(8)
+            data = f.read(64 * 1024)
+            pos = 0
+            while pos < len(data) and data[pos] != 0:
+                name_end = data.index(b'\x00', pos)
+                type_end = data.index(b'\x00', name_end + 1)
+                size = struct.unpack('<i', data[type_end + 1:type_end + 5])[0]
+                value_start = type_end + 5
+                if data[pos:name_end] == b'channels':
+                    channel_end = data.index(b'\x00', value_start)
+                    pixel_type = struct.unpack('<i', data[channel_end + 1:channel_end + 5])[0]
+                    return 16 if pixel_type == 1 else 32
+                pos = value_start + size
+        return None
+
+# stats, histogram and a small thumbnail of one map
+def map_stats(path, thumbnail_size=32, bins=32):
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    # maps the preview already holds are reused, everything else is read here and dropped again:
+    # a pack scan through the LRU would evict (and spill) every map the preview is using
+    source = tiled_maps.get(key)
+    if source is None:
+        source = height_cache.get(key)
+    if source is None:
+        try:
+            source = TiledHeightMap(path)
+        except ValueError:
+            source = load_height_map(path)
+    if isinstance(source, TiledHeightMap):
+        # streamed maps are measured on a ~1K mip level, min / max are of the box filtered texels
+        heights, bit_depth = source.level_array(source.level_for(1024)), source.bit_depth
+    else:
+        heights, bit_depth = source, file_bit_depth(path)
+    thumbnail = decode_tile_from(heights, thumbnail_size)
+    return {
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'width': int(source.shape[1]),
+        'height': int(source.shape[0]),
+        'bit_depth': bit_depth,
+        'min': float(heights.min()),
+        'max': float(heights.max()),
+        'mean': float(heights.mean()),
+        'histogram': np.histogram(heights, bins=bins, range=(0.0, 1.0))[0].tolist(),
+        'thumbnail_size': thumbnail_size,
+        'thumbnail': base64.b64encode(np.clip(thumbnail * 255.0 + 0.5, 0, 255).astype(np.uint8).tobytes()).decode('ascii'),
+    }
+
+# the saved index, {} when there is none yet
+def load_alpha_index():
+    path = alpha_index_path()
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_alpha_index(index):
+    with open(alpha_index_path(), 'w') as f:
+        json.dump(index, f)
+
+# entry is still valid while the file keeps its mtime and size
+def index_entry_is_fresh(entry, path):
+    stat = os.stat(path)
+    return entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('size') == stat.st_size
+
+# scan the pack, only new or changed maps are decoded, removed maps leave the index
+def build_alpha_index():
+    start = time.perf_counter()
+    index = load_alpha_index()
+    names = scan_alpha_pack()
+    scanned = 0
+    for name in names:
+        path = alpha_path(name)
+        if name in index and index_entry_is_fresh(index[name], path):
+            continue
+        try:
+            index[name] = map_stats(path)
+            scanned += 1
+        except RuntimeError:
+            cmds.warning(f'Could not decode {name}, left out of the index.')
+    for name in [name for name in index if name not in names]:
+        del index[name]
+    save_alpha_index(index)
+    print(f'Alpha index: {len(index)} maps, {scanned} rescanned in {time.perf_counter() - start:.3f} s')
+    return index
+
+# index entry of one map, refreshed on its own when the file changed
+def alpha_index_entry(my_file_name):
+    path = alpha_path(my_file_name)
+    if not my_file_name or not os.path.isfile(path):
+        return None
+    index = load_alpha_index()
+    entry = index.get(my_file_name)
+    if entry is None or not index_entry_is_fresh(entry, path):
+        entry = index[my_file_name] = map_stats(path)
+        save_alpha_index(index)
+    return entry
+
+# thumbnail of an index entry as a float array (0-1)
+def index_thumbnail(entry):
+    size = entry['thumbnail_size']
+    return np.frombuffer(base64.b64decode(entry['thumbnail']), dtype=np.uint8).reshape(size, size) / 255.0
+
+# names in the index matching a pattern, sorted by name, resolution, bit_depth, range or mean
+def search_alpha_pack(pattern='', sort_by='name', descending=False):
+    index = load_alpha_index()
+    names = [name for name in index if fnmatch.fnmatch(name.lower(), f'*{pattern.lower()}*')]
+    keys = {
+        'name': lambda name: name.lower(),
+        'resolution': lambda name: index[name]['width'] * index[name]['height'],
+        'bit_depth': lambda name: index[name]['bit_depth'] or 0,
+        'range': lambda name: index[name]['max'] - index[name]['min'],
+        'mean': lambda name: index[name]['mean'],
+    }
+    return sorted(names, key=keys[sort_by], reverse=descending)
+
+# fill the search list from the UI fields
+def show_alpha_search():
+    pattern = cmds.textField('alpha_search_input', q=True, text=True)
+    sort_by = cmds.optionMenu('alpha_sort_menu', q=True, value=True)
+    index = load_alpha_index()
+    cmds.textScrollList('alpha_search_list', e=True, removeAll=True)
+    for name in search_alpha_pack(pattern, sort_by, descending=sort_by != 'name'):
+        entry = index[name]
+        label = f'{name}  {entry["width"]}x{entry["height"]}  {entry["bit_depth"] or "?"}-bit  range {entry["max"] - entry["min"]:.2f}'
+        cmds.textScrollList('alpha_search_list', e=True, append=label)
+
+# picking a search result puts its name into the file name field
+def pick_alpha_search():
+    picked = cmds.textScrollList('alpha_search_list', q=True, selectItem=True)
+    if picked:
+        cmds.textField('my_file_name_input', e=True, text=picked[0].split('  ')[0])
 
 ui()
\ No newline at end of file
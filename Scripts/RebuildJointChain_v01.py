@@ -5,10 +5,28 @@
 # Description:
 #   - Rebuilds a joint chain based on selected joint hierarchy.
 #   - New joints are positioned according to original positions.
+#   - New joints are spaced evenly by arc length along the old chain, computed in NumPy
+#     (no temporary curve or motion paths).
+#   - Smooth mode resamples a centripetal Catmull-Rom spline through the old joints instead of
+#     the polyline, its arc-length table is cached per chain and reused for any joint count.
+#   - Joint orients (x aims down the chain, y toward world up or parallel transported) are
+#     solved for the whole chain in NumPy and written in one batch, for any selected chain too.
+#   - Batch mode rebuilds every selected root, or every chain under a hierarchy, in one undo step;
+#     the math can run in worker processes when the script is importable (on the python path).
 # Usage:
 #   - Select root joint and run.
 # ================================
 
+import maya.cmds as cmds
+import maya.mel as mel
+import hashlib
+import multiprocessing
+import numpy as np
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
 
 # create main window
 def ui():
@@ -29,89 +47,440 @@ def ui():
     # give 2 textfield for user input
     cmds.text('How many new joints do you want?')
     cmds.textField('joint_number1', h=30)
+    cmds.checkBox('smooth1', label='Smooth (Catmull-Rom spline instead of straight segments)', value=False)
     cmds.button('Create Joints', h=40, c='create_new_joint()',  bgc=[0.05,0.7,0.9])
+    # many chains at once
+    cmds.separator(height=10)
+    cmds.checkBox('whole_hierarchy1', label='Every chain under the selected hierarchy', value=False)
+    cmds.text('Worker processes (0 = rebuild in Maya)')
+    cmds.textField('workers1', h=30, text='0')
+    cmds.button('Batch Rebuild Selected', h=40, c='batch_rebuild()',  bgc=[0.05,0.5,0.7])
+    # orientation of new or existing chains (DoControl chains too)
+    cmds.separator(height=10)
+    cmds.checkBox('parallel_transport1', label='Parallel transport up vector (no flips on twisting chains)', value=False)
+    cmds.button('Orient Selected Chains', h=40, c='orient_selected()',  bgc=[0.05,0.3,0.5])
     # create window "win"
     cmds.showWindow(win)
     
 ###################################################################################################       
 '''
-1. recreate joints
+1. chain math, plain NumPy
+'''
+# count points spaced evenly by arc length along the polyline through points (n, 3)
+def resample_polyline(points, count):
+    points = np.asarray(points, dtype=np.float64)
+    if count <= 0:
+        return np.zeros((0, 3))
+    # cumulative arc length at every old joint
+    seg_length = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    arc = np.concatenate([[0.0], np.cumsum(seg_length)])
+    if len(points) < 2 or arc[-1] <= 0.0:
+        return np.repeat(points[:1], count, axis=0)
+    # segment and blend of every target length, all at once
+    target = np.linspace(0.0, arc[-1], count)
+    seg = np.clip(np.searchsorted(arc, target, side='right') - 1, 0, len(seg_length) - 1)
+    blend = (target - arc[seg]) / np.where(seg_length[seg] > 0.0, seg_length[seg], 1.0)
+    return points[seg] + (points[seg + 1] - points[seg]) * blend[:, None]
+
+# points on a centripetal Catmull-Rom spline, ctrl has one extra point at both ends,
+# segment seg runs from ctrl[seg + 1] to ctrl[seg + 2] as u goes 0 to 1
+def catmull_rom(ctrl, seg, u):
+    p0, p1, p2, p3 = (ctrl[seg + k] for k in range(4))
+    # knot spacing is the square root of the chord length, which keeps loops and cusps out
+    d01, d12, d23 = (np.maximum(np.linalg.norm(b - a, axis=1) ** 0.5, 1e-9)[:, None] for a, b in ((p0, p1), (p1, p2), (p2, p3)))
+    t1, t2 = d01, d01 + d12
+    t3 = t2 + d23
+    t = t1 + u[:, None] * d12
+    a1 = ((t1 - t) * p0 + t * p1) / t1
+    a2 = ((t2 - t) * p1 + (t - t1) * p2) / d12
+    a3 = ((t3 - t) * p2 + (t - t2) * p3) / d23
+    b1 = ((t2 - t) * a1 + t * a2) / t2
+    b2 = ((t3 - t) * a2 + (t - t1) * a3) / (t3 - t1)
+    return ((t2 - t) * b1 + (t - t1) * b2) / d12
+
+# arc-length tables of smooth chains, keyed by a digest of the joint positions
+_arc_tables = {}
+
+# control points plus a dense (arc length, spline parameter) table of the spline through points
+def arc_length_table(points, samples_per_segment=64):
+    key = hashlib.sha1(points.tobytes()).hexdigest()
+    if key not in _arc_tables:
+        # mirrored end points give the first and last joint a natural tangent
+        ctrl = np.vstack([2 * points[0] - points[1], points, 2 * points[-1] - points[-2]])
+        params = np.linspace(0.0, len(points) - 1, (len(points) - 1) * samples_per_segment + 1)
+        seg = np.minimum(params.astype(np.int64), len(points) - 2)
+        dense = catmull_rom(ctrl, seg, params - seg)
+        arc = np.concatenate([[0.0], np.cumsum(np.linalg.norm(np.diff(dense, axis=0), axis=1))])
+        _arc_tables[key] = (ctrl, arc, params)
+    return _arc_tables[key]
+
+# count points spaced evenly by arc length along a smooth spline through points (n, 3)
+def resample_spline(points, count):
+    points = np.asarray(points, dtype=np.float64)
+    if count <= 0 or len(points) < 3:
+        return resample_polyline(points, count)
+    ctrl, arc, params = arc_length_table(points)
+    if arc[-1] <= 0.0:
+        return np.repeat(points[:1], count, axis=0)
+    param = np.interp(np.linspace(0.0, arc[-1], count), arc, params)
+    seg = np.minimum(param.astype(np.int64), len(points) - 2)
+    return catmull_rom(ctrl, seg, param - seg)
+
+# unit rows, rows too short to have a direction are left at zero
+def normalize_rows(v):
+    length = np.linalg.norm(v, axis=1, keepdims=True)
+    return np.where(length > 1e-9, v / np.maximum(length, 1e-9), 0.0)
+
+# world frames (n, 3, 3) of a chain, rows are the x, y, z axes: x aims at the next joint,
+# y leans to up (or is parallel transported from the first joint), z = x cross y;
+# the last joint aims at aim_point when given, else it keeps its parent's frame
+def orientation_frames(points, up=(0.0, 1.0, 0.0), parallel_transport=False, aim_point=None):
+    points = np.asarray(points, dtype=np.float64)
+    ends = points[1:] if aim_point is None else np.vstack([points[1:], [aim_point]])
+    x = normalize_rows(ends - points[:len(ends)])
+    if not len(x):
+        return np.zeros((0, 3, 3))
+    # coincident joints borrow the aim of the joint before (or after) them
+    for i in list(range(1, len(x))) + list(range(len(x) - 2, -1, -1)):
+        if not x[i].any():
+            x[i] = x[i - 1] if i and x[i - 1].any() else x[min(i + 1, len(x) - 1)]
+    if not x[0].any():
+        x[:] = (1.0, 0.0, 0.0)
+    up = np.asarray(up, dtype=np.float64)
+    y = normalize_rows(up - (x @ up)[:, None] * x)
+    # aiming straight along up: fall back to world z as the up vector
+    flat = ~y.any(axis=1)
+    y[flat] = normalize_rows(np.array([0.0, 0.0, 1.0]) - x[flat, 2:3] * x[flat])
+    if parallel_transport:
+        # minimal rotation of the previous y from the previous x onto this x
+        for i in range(1, len(x)):
+            axis = np.cross(x[i - 1], x[i])
+            cos = float(x[i - 1] @ x[i])
+            prev = y[i - 1]
+            turned = prev * cos + np.cross(axis, prev) + axis * (axis @ prev) / (1.0 + cos) if cos > -1.0 + 1e-9 else -prev
+            turned -= (turned @ x[i]) * x[i]
+            y[i] = turned / max(np.linalg.norm(turned), 1e-9)
+    frames = np.stack([x, y, np.cross(x, y)], axis=1)
+    if len(frames) < len(points):
+        frames = np.vstack([frames, frames[-1:]])
+    return frames
+
+# xyz euler angles (degrees) of rotation matrices in Maya's row vector convention (R = Rx Ry Rz)
+def euler_xyz(matrices):
+    m = np.asarray(matrices, dtype=np.float64)
+    ry = np.arcsin(np.clip(-m[:, 0, 2], -1.0, 1.0))
+    rx = np.arctan2(m[:, 1, 2], m[:, 2, 2])
+    rz = np.arctan2(m[:, 0, 1], m[:, 0, 0])
+    # gimbal lock: y is +-90, x takes the whole twist
+    lock = np.hypot(m[:, 0, 0], m[:, 0, 1]) < 1e-9
+    rx[lock] = np.arctan2(-m[lock, 2, 1], m[lock, 1, 1])
+    rz[lock] = 0.0
+    return np.degrees(np.stack([rx, ry, rz], axis=1))
+
+# jointOrient angles and local translates of a chain from its world frames; the first joint is
+# measured against parent_frame, and against parent_point too when its parent is a rewritten joint
+def joint_orients(points, frames, parent_frame=np.eye(3), parent_point=None):
+    parents = np.concatenate([[parent_frame], frames[:-1]])
+    orients = euler_xyz(frames @ np.transpose(parents, (0, 2, 1)))
+    starts = points[:-1] if parent_point is None else np.vstack([[parent_point], points[:-1]])
+    # world offset to the previous joint, seen from the previous joint's frame
+    translates = np.einsum('ij,ikj->ik', points[len(points) - len(starts):] - starts, parents[len(parents) - len(starts):])
+    return orients, translates
+
+# resample_polyline or resample_spline plus the seconds it took, run inside the worker processes
+def timed_resample(points, count, smooth=False):
+    start = time.perf_counter()
+    resampled = resample_spline(points, count) if smooth else resample_polyline(points, count)
+    return resampled, time.perf_counter() - start
+
+# resample every chain, in worker processes when workers > 1 and this script can be imported
+# (workers import it by name, a script run from the Script Editor can't be found by them)
+# (each worker keeps its own arc-length tables, only in-process runs share the cache)
+def resample_chains(chains, count, workers=0, smooth=False):
+    if workers > 1 and len(chains) > 1:
+        try:
+            import RebuildJointChain_v01 as engine
+        except ImportError:
+            engine = None
+            print('RebuildJointChain_v01 is not on the python path, resampling in this process.')
+        if engine is not None:
+            context = multiprocessing.get_context('spawn')
+            # inside Maya the workers have to be mayapy, not a second Maya
+            mayapy = os.path.join(os.environ.get('MAYA_LOCATION', ''), 'bin', 'mayapy' + ('.exe' if os.name == 'nt' else ''))
+            if os.path.isfile(mayapy):
+                context.set_executable(mayapy)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                chunk = max(1, len(chains) // (workers * 4))
+                return list(pool.map(engine.timed_resample, chains, repeat(count), repeat(smooth), chunksize=chunk))
+    return [timed_resample(points, count, smooth) for points in chains]
+
+###################################################################################################       
+'''
+2. recreate joints
 '''
+# root plus every joint under it, in chain order
+def chain_joints(root):
+    joints = cmds.listRelatives(root, ad=True, f=True, type='joint') or []
+    joints.reverse()
+    joints.insert(0, root)
+    return joints
+
+# world positions of a joint list as an (n, 3) array
+def chain_positions(joints):
+    return np.array([cmds.xform(i, q=True, ws=True, t=True) for i in joints], dtype=np.float64)
+
+# new chain through positions in one pass: every joint is created under the previous one
+def build_chain(positions, parallel_transport=False):
+    cmds.select(cl=True)
+    new_joint_group = [cmds.joint(p=tuple(p)) for p in positions.tolist()]
+    cmds.select(cl=True)
+    if new_joint_group:
+        # x axis down the chain, y up, solved for all joints at once
+        orient_chain(new_joint_group, positions, parallel_transport=parallel_transport)
+    return new_joint_group
+
+# rotation part of a node's world matrix, scale taken out
+def world_rotation(node):
+    matrix = np.array(cmds.xform(node, q=True, ws=True, matrix=True), dtype=np.float64).reshape(4, 4)[:3, :3]
+    return normalize_rows(matrix)
+
+# jointOrient and translate of many joints as batched MEL setAttr, rotate and rotateAxis zeroed
+def write_joint_attrs(joints, orients, translates, chunk_size=2000):
+    values = np.hstack([orients, translates]).tolist()
+    for begin in range(0, len(joints), chunk_size):
+        chunk = zip(joints[begin:begin + chunk_size], values[begin:begin + chunk_size])
+        mel.eval(''.join(f'setAttr "{j}.jointOrient" {v[0]!r} {v[1]!r} {v[2]!r}; setAttr "{j}.rotate" 0 0 0; '
+                         f'setAttr "{j}.rotateAxis" 0 0 0; setAttr "{j}.translate" {v[3]!r} {v[4]!r} {v[5]!r};' for j, v in chunk))
+
+# constraints orient_selected works around: lifted before the write, re-created with -mo after
+constraint_commands = {'parentConstraint': cmds.parentConstraint, 'pointConstraint': cmds.pointConstraint,
+                       'orientConstraint': cmds.orientConstraint}
+
+# incoming connections of the written attributes (x / y / z too): constraints that can be lifted,
+# as {constraint: joint}, and joints that can't be written at all (keys, expressions, other
+# constraints, locked attributes), setAttr on those would stop a MEL chunk partway
+def joint_drivers(joints):
+    names = [attr + axis for attr in ('jointOrient', 'rotate', 'rotateAxis', 'translate') for axis in ('', 'X', 'Y', 'Z')]
+    driven = cmds.listConnections([f'{j}.{name}' for j in joints for name in names],
+                                  s=True, d=False, connections=True, skipConversionNodes=True) or []
+    constraints, blocked = {}, set()
+    for plug, source in zip(driven[::2], driven[1::2]):
+        joint = cmds.ls(plug, l=True, objectsOnly=True)[0]
+        if cmds.nodeType(source) in constraint_commands:
+            constraints[cmds.ls(source, l=True)[0]] = joint
+        else:
+            blocked.add(joint)
+    for joint in joints:
+        if set(cmds.listAttr(joint, locked=True) or []) & set(names):
+            blocked.add(cmds.ls(joint, l=True)[0])
+    return constraints, blocked
+
+# delete constraints, keeping what re-creates them: targets, weights, skipped axes and interpolation
+def lift_constraints(constraints):
+    lifted = []
+    for con, joint in constraints.items():
+        kind = cmds.nodeType(con)
+        command = constraint_commands[kind]
+        targets = command(con, q=True, targetList=True)
+        weights = [cmds.getAttr(f'{con}.{alias}') for alias in command(con, q=True, weightAliasList=True)]
+        flags = {}
+        for attr in ('Translate', 'Rotate'):
+            if not cmds.attributeQuery('constraint' + attr, node=con, exists=True):
+                continue
+            skip = [axis.lower() for axis in 'XYZ'
+                    if not cmds.isConnected(f'{con}.constraint{attr}{axis}', f'{joint}.{attr.lower()}{axis}')]
+            if skip:
+                flags['skip' + attr if kind == 'parentConstraint' else 'skip'] = skip
+        interp = cmds.getAttr(con + '.interpType') if kind != 'pointConstraint' else None
+        lifted.append((command, con.split('|')[-1], targets, weights, joint, flags, interp))
+    if constraints:
+        cmds.delete(list(constraints))
+    return lifted
+
+# re-create lifted constraints with -mo, so the controls keep the joints where they are now
+def restore_constraints(lifted):
+    for command, name, targets, weights, joint, flags, interp in lifted:
+        con = command(targets, joint, mo=True, name=name, **flags)[0]
+        for alias, weight in zip(command(con, q=True, weightAliasList=True), weights):
+            cmds.setAttr(f'{con}.{alias}', weight)
+        if interp is not None:
+            cmds.setAttr(con + '.interpType', interp)
+
+# orient one chain from its world positions (read before anything moved), returns its frames;
+# parent_frame / parent_point describe a parent joint that was already rewritten
+def orient_chain(joints, points, parallel_transport=False, aim_point=None, parent_frame=None, parent_point=None):
+    points = np.asarray(points, dtype=np.float64)
+    frames = orientation_frames(points, parallel_transport=parallel_transport, aim_point=aim_point)
+    if parent_frame is None:
+        parent = cmds.listRelatives(joints[0], p=True, f=True)
+        parent_frame = world_rotation(parent[0]) if parent else np.eye(3)
+    if not len(frames):
+        frames = np.repeat(parent_frame[None], len(points), axis=0)
+    orients, translates = joint_orients(points, frames, parent_frame, parent_point)
+    if parent_point is None:
+        # the first joint keeps its own translate, its parent is not changing
+        translates = np.vstack([cmds.getAttr(joints[0] + '.translate')[0], translates])
+    write_joint_attrs(joints, orients, translates)
+    return frames
+
+# orient every chain under root; all positions are read first, parents are solved before children
+def orient_hierarchy(root, parallel_transport=False):
+    chains = hierarchy_chains(root)
+    points = [chain_positions(joints) for joints, _ in chains]
+    # a branching joint aims at its first child chain
+    first_child = {}
+    for i, (_, parent) in enumerate(chains):
+        if parent >= 0 and parent not in first_child:
+            first_child[parent] = i
+    frames = []
+    for i, (joints, parent) in enumerate(chains):
+        aim_point = points[first_child[i]][0] if i in first_child else None
+        if parent >= 0:
+            frames.append(orient_chain(joints, points[i], parallel_transport, aim_point, frames[parent][-1], points[parent][-1]))
+        else:
+            frames.append(orient_chain(joints, points[i], parallel_transport, aim_point))
+    return frames
+
+# orient every selected chain (any joint chain, DoControl ones included) in one undo step;
+# parent / point / orient constraints are lifted and re-created around the write, hierarchies with
+# other drivers or locked attributes are skipped before anything is written
+def orient_selected(parallel_transport=None):
+    if parallel_transport is None:
+        parallel_transport = cmds.checkBox('parallel_transport1', q=True, value=True)
+    start = time.perf_counter()
+    roots = []
+    constraints = {}
+    for root in cmds.ls(sl=True, l=True, type='joint'):
+        joints = [root] + (cmds.listRelatives(root, ad=True, f=True, type='joint') or [])
+        root_constraints, blocked = joint_drivers(joints)
+        if blocked:
+            cmds.warning(f'Skipped {root}: {len(blocked)} joints have keyed, connected or locked attributes '
+                         f'(e.g. {sorted(blocked)[0]}).')
+        else:
+            roots.append(root)
+            constraints.update(root_constraints)
+    cmds.undoInfo(openChunk=True, chunkName='RebuildJointChain_orient')
+    try:
+        lifted = lift_constraints(constraints)
+        count = sum(sum(len(f) for f in orient_hierarchy(root, parallel_transport)) for root in roots)
+        restore_constraints(lifted)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+    print(f'Oriented {count} joints in {time.perf_counter() - start:.3f} s'
+          + (f', {len(lifted)} constraints re-created' if lifted else ''))
+
+# time the solver alone and a full build + orient on wavy chains, e.g. benchmark_orient()
+def benchmark_orient(counts=(100, 1000, 10000), build=True):
+    for count in counts:
+        t = np.linspace(0.0, 20.0 * np.pi, count)
+        points = np.stack([np.cos(t) * 5.0, t, np.sin(t) * 5.0], axis=1)
+        start = time.perf_counter()
+        frames = orientation_frames(points, parallel_transport=True)
+        joint_orients(points, frames)
+        report = f'{count} joints: solve {time.perf_counter() - start:.4f} s'
+        if build:
+            start = time.perf_counter()
+            chain = build_chain(points, parallel_transport=True)
+            report += f', build + orient {time.perf_counter() - start:.3f} s'
+            cmds.delete(chain[0])
+        print(report)
+
+# split a hierarchy into chains: a chain runs down single children and ends on a branching
+# joint, each branch starts a new chain; returns (joints, index of the parent chain or -1)
+def hierarchy_chains(root):
+    chains = []
+    stack = [(root, -1)]
+    while stack:
+        joint, parent = stack.pop()
+        joints = [joint]
+        children = cmds.listRelatives(joint, c=True, f=True, type='joint') or []
+        while len(children) == 1:
+            joints.append(children[0])
+            children = cmds.listRelatives(children[0], c=True, f=True, type='joint') or []
+        chains.append((joints, parent))
+        stack += [(child, len(chains) - 1) for child in children]
+    return chains
+
+# rebuild every selected root (or every chain under them) with joint_number joints each,
+# positions are read in one pass and all joints are written in one undo chunk
+def batch_rebuild(joint_number=None, whole_hierarchy=None, workers=None, smooth=None, parallel_transport=None):
+    if joint_number is None:
+        joint_number = int(cmds.textField('joint_number1', q=True, text=True))
+    if whole_hierarchy is None:
+        whole_hierarchy = cmds.checkBox('whole_hierarchy1', q=True, value=True)
+    if workers is None:
+        workers = int(cmds.textField('workers1', q=True, text=True) or 0)
+    if smooth is None:
+        smooth = cmds.checkBox('smooth1', q=True, value=True)
+    if parallel_transport is None:
+        parallel_transport = cmds.checkBox('parallel_transport1', q=True, value=True)
+    start = time.perf_counter()
+    chains = []
+    for root in cmds.ls(sl=True, l=True, type='joint'):
+        if whole_hierarchy:
+            offset = len(chains)
+            chains += [(joints, parent + offset if parent >= 0 else -1) for joints, parent in hierarchy_chains(root)]
+        else:
+            chains.append((chain_joints(root), -1))
+    # single joints have nothing to resample
+    keep = [i for i, (joints, _) in enumerate(chains) if len(joints) > 1]
+    remap = {old: new for new, old in enumerate(keep)}
+    chains = [(chains[i][0], remap.get(chains[i][1], -1)) for i in keep]
+    if not chains:
+        cmds.warning('Select one or more root joints with children.')
+        return []
+
+    # one query pass for every joint of every chain
+    positions = [chain_positions(joints) for joints, _ in chains]
+    query_time = time.perf_counter() - start
+
+    math_start = time.perf_counter()
+    resampled = resample_chains(positions, joint_number, workers, smooth)
+    math_time = time.perf_counter() - math_start
+
+    # write everything as one undo step, branches go back under their rebuilt parent chain
+    write_start = time.perf_counter()
+    new_chains = []
+    cmds.undoInfo(openChunk=True, chunkName='RebuildJointChain_batch')
+    cmds.refresh(suspend=True)
+    try:
+        for (joints, parent), (points, seconds) in zip(chains, resampled):
+            chain_start = time.perf_counter()
+            cmds.hide(joints)
+            new_joint_group = build_chain(points, parallel_transport)
+            if parent >= 0:
+                new_joint_group[0] = cmds.parent(new_joint_group[0], new_chains[parent][-1])[0]
+            new_chains.append(new_joint_group)
+            print(f'{joints[0].split("|")[-1]}: {len(joints)} -> {len(new_joint_group)} joints, '
+                  f'math {seconds * 1000.0:.2f} ms, write {(time.perf_counter() - chain_start) * 1000.0:.2f} ms')
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+    write_time = time.perf_counter() - write_start
+    print(f'Batch rebuild: {len(chains)} chains in {time.perf_counter() - start:.3f} s '
+          f'(query {query_time:.3f} s, math {math_time:.3f} s with {max(workers, 1)} process(es), write {write_time:.3f} s)')
+    return new_chains
+
 # function to create new joints and hide old ones
 def create_new_joint():
     # assign variables
     joint_number=int(cmds.textField('joint_number1', q=True, text=True))
+    start = time.perf_counter()
     
     # select old joints, and put them in a list
     original_joint=cmds.ls(sl=True,l=True)[0]
-    # make a new list with old joints and  reverse
-    original_joint_list=cmds.listRelatives(original_joint, ad=True,f=True)
-    original_joint_list.reverse()
-    original_joint_list.insert(0,original_joint)
-    # get position information in list
-    post_list=[cmds.xform(i, q=True, ws=True, t=True) for i in original_joint_list]
-    
-    # create curve along old joints
-    path=cmds.curve(n='post_curve', d=1, p=(post_list))
-    # rebuild curve to set parameter range to 0-1
-    cmds.rebuildCurve(n='path',d=1,kr=0,kcp=True)
+    original_joint_list=chain_joints(original_joint)
+    # get position information as one array
+    post_list=chain_positions(original_joint_list)
         
     # hide old joints
     cmds.hide(original_joint_list)
     
-    # create new joints, and put them on motionpath one by one
-    motionpath_list=[]
-    joint_group=[]   
-    for i in range(joint_number):
-        cmds.select(cl=True)
-        create_joint=cmds.joint()
-        create_motion_path=cmds.pathAnimation(create_joint, c=path)
-        cmds.setAttr('%s.uValue'%create_motion_path, 1.0/(joint_number-1)*i)
-        motionpath_list.append(create_motion_path)
-        joint_group.append(create_joint)
-        cmds.select(cl=True)
-        
-   
-    # duplicate each joints, put new joints in group and delete old joints
-    new_joint_group=[]
-    for i in joint_group:
-        cmds.select(i)
-        # list connection with each joints and delete
-        selected = cmds.ls(sl=True)[0]
-        disconnected = cmds.listConnections('%s.tx'%selected, plugs=True)[0]
-        cmds.disconnectAttr(disconnected, '%s.tx'%selected)
-        disconnected = cmds.listConnections('%s.ty'%selected, plugs=True)[0]
-        cmds.disconnectAttr(disconnected, '%s.ty'%selected)
-        disconnected = cmds.listConnections('%s.tz'%selected, plugs=True)[0]
-        cmds.disconnectAttr(disconnected, '%s.tz'%selected)
-        
-        joint_dupicate = cmds.duplicate()
-        new_joint_group.append(joint_dupicate)
-        cmds.select(cl=True)
-        cmds.delete(i)
-        
-    # reverse new joint list for parent joints    
-    new_joint_group.reverse()
-    
-    # delete the old curve
-    cmds.delete('post_curve')
-    
-    # parent joints
-    for i in range(int(len(new_joint_group)-1)):
-        cmds.parent(new_joint_group[i],new_joint_group[i+1])
-        
-    # edit x axis for each joint   
-    first_joint=new_joint_group[-1]
-    cmds.select(first_joint)  
-    select_joint = cmds.ls(sl=True)    
-    selected_joint_list = cmds.listRelatives(ad=True, f=True)
-    selected_joint_list.reverse()
-    selected_joint_list.insert(0, select_joint[0])
-    cmds.select(selected_joint_list)
-    
-    select_joint_second_grp = cmds.ls(sl=True)
-    for i in new_joint_group:
-        cmds.joint(e=True, zso=True, oj='xyz', sao='yup')
+    resampled = timed_resample(post_list, joint_number, cmds.checkBox('smooth1', q=True, value=True))[0]
+    new_joint_group = build_chain(resampled, cmds.checkBox('parallel_transport1', q=True, value=True))
+    print(f'Rebuilt {len(original_joint_list)} joints into {len(new_joint_group)} in {time.perf_counter() - start:.3f} s')
+    return new_joint_group
         
-# call functions
-ui()
\ No newline at end of file
+# call functions, not when a worker process imports this script
+if __name__ == '__main__':
+    ui()
\ No newline at end of file
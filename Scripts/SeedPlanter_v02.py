@@ -5,6 +5,17 @@
 # Description:
 #   - Allows user to plant selected objects (seeds) onto a ground mesh.
 #   - Seeds are randomly scattered across surface points.
+#   - Surface points are drawn area-weighted from the ground triangles in one pass.
+#   - Blue Noise mode keeps seeds apart using a spatial hash grid (dart throwing).
+#   - Instancer output keeps all seeds in one instancer node, bake to transforms on demand.
+#   - Scale / rotate / collapse are written in bulk as one undo step, like planting, bake, load and clear;
+#     undo / redo put the seed arrays (and the instancer points) back along with the nodes.
+#   - Changing the count only adds or removes the difference, Reseed rebuilds everything.
+#   - Scatters are seeded and can be saved to / loaded from a .npz scatter cache.
+#   - Density Map mode importance-samples a greyscale map through the ground UVs.
+#   - Drop mode casts every seed straight down onto the highest ground hit (triangle BVH).
+#   - Seeds are planted in chunks with a progress bar, press Esc to stop early.
+#   - No Overlap mode keeps bounding spheres apart and re-validates them after scaling.
 #   - Rearrangement can be applied after planting to randomize again.
 # Usage:
 #   - Select ground object first. Then select seed object.
@@ -13,15 +24,627 @@
 
 
 import maya.cmds as cmds
-import random
+import maya.mel as mel
+import maya.api.OpenMaya as om
+import maya.OpenMaya as om1
+import numpy as np
+import ctypes
+import hashlib
+import os
+import json
+import time
+import zipfile
+from contextlib import contextmanager
+from itertools import product
+
+
+### sampling engine: pull ground triangles once, then draw any number of points
+class SurfaceSampler:
+    def __init__(self, ground):
+        self.ground = ground
+        sel = om.MSelectionList()
+        sel.add(ground)
+        dag = sel.getDagPath(0)
+        dag.extendToShape()
+        self.mesh = om.MFnMesh(dag)
+        self.uv_res = None
+
+        # world space vertex positions and normals as arrays
+        self.points = np.array(self.mesh.getPoints(om.MSpace.kWorld), dtype=np.float64)[:, :3]
+        self.normals = np.array(self.mesh.getVertexNormals(False, om.MSpace.kWorld), dtype=np.float64)
+
+        # triangles as face-vertex indices, so vertex ids and uv ids share one table
+        vertex_counts, vertex_list = self.mesh.getVertices()
+        tri_counts, tri_offsets = self.mesh.getTriangleOffsets()
+        vertex_counts = np.array(vertex_counts, dtype=np.int64)
+        face_start = np.cumsum(vertex_counts) - vertex_counts
+        self.face_vertex_total = int(vertex_counts.sum())
+        tri_face = np.repeat(np.arange(len(vertex_counts)), np.array(tri_counts, dtype=np.int64))
+        self.face_verts = face_start[tri_face][:, None] + np.array(tri_offsets, dtype=np.int64).reshape(-1, 3)
+        self.tris = np.array(vertex_list, dtype=np.int64)[self.face_verts]
+
+        # cumulative area table, so bigger triangles get more seeds
+        a, b, c = (self.points[self.tris[:, k]] for k in range(3))
+        areas = 0.5 * np.linalg.norm(np.cross(b - a, c - a), axis=1)
+        self.cdf = np.cumsum(areas)
+
+        # identifies this exact ground shape, stored in scatter caches
+        digest = hashlib.sha1(self.points.tobytes())
+        digest.update(self.tris.tobytes())
+        self.fingerprint = digest.hexdigest()
+
+    ### cheap check that the ground still has the shape this sampler was built from (edited, moved
+    ### or deformed grounds fail), re-reading points costs far less than the triangles, CDF and BVH
+    def is_current(self):
+        if not cmds.objExists(self.ground):
+            return False
+        sel = om.MSelectionList()
+        sel.add(self.ground)
+        dag = sel.getDagPath(0)
+        dag.extendToShape()
+        mesh = om.MFnMesh(dag)
+        if mesh.numVertices != len(self.points) or mesh.numFaceVertices != self.face_vertex_total:
+            return False
+        return np.array_equal(np.array(mesh.getPoints(om.MSpace.kWorld), dtype=np.float64)[:, :3], self.points)
+    ### draw count points (and interpolated normals) uniformly over the surface area
+    def sample(self, count, rng):
+        if count <= 0 or not len(self.cdf):
+            return np.zeros((0, 3)), np.zeros((0, 3))
+        face = np.searchsorted(self.cdf, rng.random(count) * self.cdf[-1], side='right')
+        face = np.minimum(face, len(self.cdf) - 1)
+
+        # uniform barycentric coordinates inside each picked triangle
+        r1 = np.sqrt(rng.random(count))
+        r2 = rng.random(count)
+        bary = np.stack([1.0 - r1, r1 * (1.0 - r2), r1 * r2], axis=1)
+
+        return self.interpolate(face, bary)
+
+    ### positions and normals at barycentric coordinates inside the given triangles
+    def interpolate(self, face, bary):
+        corners = self.tris[face]
+        positions = np.einsum('nk,nkj->nj', bary, self.points[corners])
+        normals = np.einsum('nk,nkj->nj', bary, self.normals[corners])
+        normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+        return positions, normals
+
+    ### bin every triangle into a uniform grid over UV space, built on first use
+    def build_uv_grid(self):
+        us, vs = self.mesh.getUVs()
+        uv_counts, uv_ids = self.mesh.getAssignedUVs()
+        if len(uv_ids) != self.face_vertex_total or not len(us):
+            return False
+        uvs = np.stack([np.array(us), np.array(vs)], axis=1)
+        self.tri_uvs = uvs[np.array(uv_ids, dtype=np.int64)[self.face_verts]]
+
+        res = int(np.clip(np.sqrt(len(self.tris)), 1, 1024))
+        lo = np.clip(np.floor(self.tri_uvs.min(axis=1) * res), 0, res - 1).astype(np.int64)
+        hi = np.clip(np.floor(self.tri_uvs.max(axis=1) * res), 0, res - 1).astype(np.int64)
+        nx = hi[:, 0] - lo[:, 0] + 1
+        n = nx * (hi[:, 1] - lo[:, 1] + 1)
+
+        # one (cell, triangle) entry per covered cell, sorted into a cell -> triangles table
+        tri = np.repeat(np.arange(len(self.tris)), n)
+        k = np.arange(len(tri)) - np.repeat(np.cumsum(n) - n, n)
+        cell = (lo[tri, 1] + k // nx[tri]) * res + lo[tri, 0] + k % nx[tri]
+        order = np.argsort(cell, kind='stable')
+        self.uv_cell_tris = tri[order]
+        self.uv_cell_start = np.searchsorted(cell[order], np.arange(res * res + 1))
+        self.uv_res = res
+        return True
+
+    ### find the triangle and barycentric coordinates under each uv,
+    ### returns the indices of the uvs that landed on the mesh with their face and bary
+    def locate_uvs(self, uv):
+        res = self.uv_res
+        cells = np.clip(np.floor(uv * res).astype(np.int64), 0, res - 1)
+        cell = cells[:, 1] * res + cells[:, 0]
+        start = self.uv_cell_start[cell]
+        n = self.uv_cell_start[cell + 1] - start
+        pair = np.repeat(np.arange(len(uv)), n)
+        tri = self.uv_cell_tris[np.repeat(start, n) + np.arange(len(pair)) - np.repeat(np.cumsum(n) - n, n)]
+
+        a, b, c = (self.tri_uvs[tri, k] for k in range(3))
+        v0, v1, v2 = b - a, c - a, uv[pair] - a
+        den = v0[:, 0] * v1[:, 1] - v1[:, 0] * v0[:, 1]
+        den = np.where(np.abs(den) < 1e-20, 1e-20, den)
+        l1 = (v2[:, 0] * v1[:, 1] - v1[:, 0] * v2[:, 1]) / den
+        l2 = (v0[:, 0] * v2[:, 1] - v2[:, 0] * v0[:, 1]) / den
+        bary = np.stack([1.0 - l1 - l2, l1, l2], axis=1)
+        inside = np.all(bary >= -1e-9, axis=1)
+
+        # first containing triangle per uv
+        hit, first = np.unique(pair[inside], return_index=True)
+        return hit, tri[inside][first], bary[inside][first]
+
+    ### importance-sample count points from a density map through the ground UVs
+    def sample_density(self, density, count, rng, max_tries=20):
+        if self.uv_res is None and not self.build_uv_grid():
+            cmds.warning("Ground needs UVs on every face for Density Map mode.")
+            return np.zeros((0, 3)), np.zeros((0, 3))
+        image, cdf = density
+        height, width = image.shape
+        positions, normals = [], []
+        found = 0
+        tries = 0
+        while found < count and tries < max_tries * count and cdf[-1] > 0:
+            # pick pixels from the flattened 2D CDF, then jitter inside the pixel
+            batch = count - found
+            tries += batch
+            pixel = np.minimum(np.searchsorted(cdf, rng.random(batch) * cdf[-1], side='right'), len(cdf) - 1)
+            row, col = np.divmod(pixel, width)
+            uv = np.stack([(col + rng.random(batch)) / width, (row + rng.random(batch)) / height], axis=1)
+
+            # uvs that fall between UV shells are simply drawn again
+            hit, face, bary = self.locate_uvs(uv)
+            pos, nrm = self.interpolate(face, bary)
+            positions.append(pos)
+            normals.append(nrm)
+            found += len(hit)
+        if not positions:
+            return np.zeros((0, 3)), np.zeros((0, 3))
+        return np.concatenate(positions), np.concatenate(normals)
+
+    ### BVH of this ground, shared by every sampler of the same shape
+    def bvh(self):
+        if self.fingerprint not in _bvh_cache:
+            _bvh_cache[self.fingerprint] = TriangleBVH(self.points, self.tris)
+        return _bvh_cache[self.fingerprint]
+
+    ### drop (x, z) pairs straight down onto the ground, returns the indices that hit with their points
+    def drop_points(self, xz):
+        hit, face, bary = self.bvh().drop(xz)
+        positions, normals = self.interpolate(face, bary)
+        return hit, positions, normals
+
+    ### pick x / z inside the ground bounds and drop them straight down, misses are drawn again
+    def sample_drop(self, count, rng, max_tries=20):
+        lo, hi = self.points.min(axis=0), self.points.max(axis=0)
+        positions, normals = [], []
+        found = 0
+        tries = 0
+        while found < count and tries < max_tries * count:
+            batch = count - found
+            tries += batch
+            xz = lo[[0, 2]] + rng.random((batch, 2)) * (hi[[0, 2]] - lo[[0, 2]])
+            hit, pos, nrm = self.drop_points(xz)
+            positions.append(pos)
+            normals.append(nrm)
+            found += len(hit)
+        if not positions:
+            return np.zeros((0, 3)), np.zeros((0, 3))
+        return np.concatenate(positions), np.concatenate(normals)
+
+
+### bounding volume hierarchy over the ground triangles for batched vertical ray casts
+class TriangleBVH:
+    def __init__(self, points, tris, leaf_size=8):
+        start_time = time.perf_counter()
+        self.corners = points[tris]
+        tri_min = self.corners.min(axis=1)
+        tri_max = self.corners.max(axis=1)
+        centers = 0.5 * (tri_min + tri_max)
+
+        # median split on the longest axis, nodes are stored in flat lists
+        self.order = np.arange(len(tris))
+        box_min, box_max, left, right, first, count = [], [], [], [], [], []
+        stack = [(0, len(tris), -1, 0)]
+        while stack:
+            lo, hi, parent, side = stack.pop()
+            node = len(box_min)
+            if parent >= 0:
+                (left if side == 0 else right)[parent] = node
+            members = self.order[lo:hi]
+            box_min.append(tri_min[members].min(axis=0))
+            box_max.append(tri_max[members].max(axis=0))
+            left.append(-1)
+            right.append(-1)
+            if hi - lo <= leaf_size:
+                first.append(lo)
+                count.append(hi - lo)
+                continue
+            first.append(0)
+            count.append(0)
+            axis = int(np.argmax(centers[members].max(axis=0) - centers[members].min(axis=0)))
+            mid = (hi - lo) // 2
+            self.order[lo:hi] = members[np.argpartition(centers[members, axis], mid)]
+            stack.append((lo + mid, hi, node, 1))
+            stack.append((lo, lo + mid, node, 0))
+
+        self.box_min = np.array(box_min)
+        self.box_max = np.array(box_max)
+        self.left = np.array(left, dtype=np.int64)
+        self.right = np.array(right, dtype=np.int64)
+        self.first = np.array(first, dtype=np.int64)
+        self.count = np.array(count, dtype=np.int64)
+        self.build_time = time.perf_counter() - start_time
+        self.query_time = 0.0
+
+    ### cast rays straight down at every (x, z), all rays walk the tree together level by level.
+    ### Returns the indices of the rays that hit, the highest triangle hit and its barycentric coords.
+    def drop(self, xz):
+        start_time = time.perf_counter()
+        x, z = xz[:, 0], xz[:, 1]
+        best = np.full(len(xz), -np.inf)
+        rays = np.arange(len(xz))
+        nodes = np.zeros(len(xz), dtype=np.int64)
+        hit_rays, hit_tris, hit_heights, hit_bary = [], [], [], []
+        while len(rays):
+            # keep ray/node pairs whose box is under the ray and above the best hit so far
+            lo, hi = self.box_min[nodes], self.box_max[nodes]
+            keep = ((x[rays] >= lo[:, 0]) & (x[rays] <= hi[:, 0]) &
+                    (z[rays] >= lo[:, 2]) & (z[rays] <= hi[:, 2]) & (hi[:, 1] >= best[rays]))
+            rays, nodes = rays[keep], nodes[keep]
+
+            # leaves: test their triangles in the x / z plane
+            leaf = self.count[nodes] > 0
+            leaf_rays, leaf_nodes = rays[leaf], nodes[leaf]
+            n = self.count[leaf_nodes]
+            pair = np.repeat(leaf_rays, n)
+            k = np.arange(len(pair)) - np.repeat(np.cumsum(n) - n, n)
+            tri = self.order[np.repeat(self.first[leaf_nodes], n) + k]
+            a, b, c = (self.corners[tri, j] for j in range(3))
+            v0, v1 = (b - a)[:, [0, 2]], (c - a)[:, [0, 2]]
+            v2 = xz[pair] - a[:, [0, 2]]
+            den = v0[:, 0] * v1[:, 1] - v1[:, 0] * v0[:, 1]
+            den = np.where(np.abs(den) < 1e-20, 1e-20, den)
+            l1 = (v2[:, 0] * v1[:, 1] - v1[:, 0] * v2[:, 1]) / den
+            l2 = (v0[:, 0] * v2[:, 1] - v2[:, 0] * v0[:, 1]) / den
+            bary = np.stack([1.0 - l1 - l2, l1, l2], axis=1)
+            inside = np.all(bary >= -1e-9, axis=1)
+            heights = np.einsum('nk,nk->n', bary, np.stack([a[:, 1], b[:, 1], c[:, 1]], axis=1))
+            if inside.any():
+                np.maximum.at(best, pair[inside], heights[inside])
+                hit_rays.append(pair[inside])
+                hit_tris.append(tri[inside])
+                hit_heights.append(heights[inside])
+                hit_bary.append(bary[inside])
+
+            # inner nodes: carry on with both children
+            inner_rays, inner_nodes = rays[~leaf], nodes[~leaf]
+            rays = np.concatenate([inner_rays, inner_rays])
+            nodes = np.concatenate([self.left[inner_nodes], self.right[inner_nodes]])
+
+        self.query_time = time.perf_counter() - start_time
+        if not hit_rays:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros((0, 3))
+        hit_rays = np.concatenate(hit_rays)
+        hit_heights = np.concatenate(hit_heights)
+        # highest hit per ray wins (overhangs, multi-level grounds)
+        order = np.lexsort((-hit_heights, hit_rays))
+        hit, first = np.unique(hit_rays[order], return_index=True)
+        pick = order[first]
+        return hit, np.concatenate(hit_tris)[pick], np.concatenate(hit_bary)[pick]
+
+
+### one BVH per ground shape, keyed by the sampler fingerprint
+_bvh_cache = {}
+
+
+### time BVH build and batched drops on the selected ground, e.g. benchmark_bvh('ground')
+def benchmark_bvh(ground, counts=(1000, 10000, 100000)):
+    sampler = SurfaceSampler(ground)
+    _bvh_cache.pop(sampler.fingerprint, None)
+    bvh = sampler.bvh()
+    print(f"BVH build: {len(sampler.tris)} triangles, {len(bvh.count)} nodes in {bvh.build_time:.3f} s")
+    rng = np.random.default_rng(0)
+    lo, hi = sampler.points.min(axis=0), sampler.points.max(axis=0)
+    for count in counts:
+        hit, _, _ = bvh.drop(lo[[0, 2]] + rng.random((count, 2)) * (hi[[0, 2]] - lo[[0, 2]]))
+        print(f"BVH drop: {count} rays, {len(hit)} hits in {bvh.query_time:.3f} s")
+
+
+### decoded density maps stay around between runs, keyed by path and modification time
+_density_maps = {}
+
+
+### read an image with Maya's MImage into a float array (row 0 is v = 0) plus its flattened CDF
+def load_density_map(path):
+    path = os.path.abspath(path)
+    key = (path, os.path.getmtime(path))
+    if key not in _density_maps:
+        image = om1.MImage()
+        # always decode to float, 16 and 32 bit maps keep their precision instead of being read as bytes
+        image.readFromFile(path, om1.MImage.kFloat)
+        width_util, height_util = om1.MScriptUtil(), om1.MScriptUtil()
+        width_ptr, height_ptr = width_util.asUintPtr(), height_util.asUintPtr()
+        image.getSize(width_ptr, height_ptr)
+        width = om1.MScriptUtil.getUint(width_ptr)
+        height = om1.MScriptUtil.getUint(height_ptr)
+
+        buffer = (ctypes.c_float * (width * height * 4)).from_address(int(image.floatPixels()))
+        rgba = np.frombuffer(buffer, dtype=np.float32).reshape(height, width, 4)
+        # HDR maps can go below 0, a negative density would break the CDF
+        grey = np.clip(rgba[..., :3].mean(axis=2, dtype=np.float64), 0.0, None)
+        for stale in [k for k in _density_maps if k[0] == path]:
+            del _density_maps[stale]
+        _density_maps[key] = (grey, np.cumsum(grey.ravel()))
+    return _density_maps[key]
+
+
+### rotations (degrees, xyz order) that turn the +Y axis onto each normal
+def normals_to_rotations(normals):
+    rx = np.degrees(np.arcsin(np.clip(normals[:, 2], -1.0, 1.0)))
+    rz = np.degrees(np.arctan2(-normals[:, 0], normals[:, 1]))
+    return np.stack([rx, np.zeros(len(normals)), rz], axis=1)
+
+
+### uniform spatial hash grid of spheres, every lookup only touches the 27 cells around a point.
+### Buckets are variable length: a (bucket, id) table kept sorted by bucket, so a crowded cell
+### (many small seeds inside one big cell) never turns a valid sphere away
+class SpatialHashGrid:
+    def __init__(self, cell):
+        # cell must be at least the largest possible collision distance (2 * max radius)
+        self.cell = float(cell)
+        self.offsets = np.array(list(product((-1, 0, 1), repeat=3)), dtype=np.int64)
+        self.positions = np.zeros((0, 3))
+        self.radii = np.zeros(0)
+        self.sorted_buckets = np.zeros(0, dtype=np.int64)
+        self.sorted_ids = np.zeros(0, dtype=np.int64)
+
+    def _buckets(self, cells):
+        return (cells[..., 0] * 73856093) ^ (cells[..., 1] * 19349663) ^ (cells[..., 2] * 83492791)
+
+    ### True for every sphere that overlaps one already in the grid
+    def collides(self, points, radii):
+        if not len(self.radii) or not len(points):
+            return np.zeros(len(points), dtype=bool)
+        cells = np.floor(points / self.cell).astype(np.int64)
+        buckets = self._buckets(cells[:, None, :] + self.offsets).ravel()
+
+        # expand the runs of the neighbour buckets into (candidate, stored) pairs
+        lo = np.searchsorted(self.sorted_buckets, buckets, side='left')
+        fill = np.searchsorted(self.sorted_buckets, buckets, side='right') - lo
+        pair = np.repeat(np.arange(len(buckets)), fill)
+        idx = self.sorted_ids[np.repeat(lo, fill) + np.arange(len(pair)) - np.repeat(np.cumsum(fill) - fill, fill)]
+        rows = pair // len(self.offsets)
+
+        d2 = np.sum((self.positions[idx] - points[rows]) ** 2, axis=1)
+        hit = d2 < (self.radii[idx] + radii[rows]) ** 2
+        return np.bincount(rows[hit], minlength=len(points)) > 0
+
+    ### add spheres, their ids continue from the ones already stored; returns a mask of the
+    ### spheres that were added (all of them, buckets have no size limit)
+    def insert(self, points, radii):
+        buckets = self._buckets(np.floor(points / self.cell).astype(np.int64))
+        order = np.argsort(buckets, kind='stable')
+        ids = np.arange(len(self.radii), len(self.radii) + len(points))
+        at = np.searchsorted(self.sorted_buckets, buckets[order], side='right')
+        self.sorted_buckets = np.insert(self.sorted_buckets, at, buckets[order])
+        self.sorted_ids = np.insert(self.sorted_ids, at, ids[order])
+        self.positions = np.concatenate([self.positions, points])
+        self.radii = np.concatenate([self.radii, radii])
+        return np.ones(len(points), dtype=bool)
+
+    ### keep only the first count spheres
+    def truncate(self, count):
+        keep = self.sorted_ids < count
+        self.sorted_buckets = self.sorted_buckets[keep]
+        self.sorted_ids = self.sorted_ids[keep]
+        self.positions = self.positions[:count]
+        self.radii = self.radii[:count]
+
+
+### True for every sphere that overlaps an earlier one in the same small batch
+def batch_conflicts(points, radii):
+    d2 = np.sum((points[:, None, :] - points[None, :, :]) ** 2, axis=2)
+    limit = (radii[:, None] + radii[None, :]) ** 2
+    earlier = np.tri(len(points), k=-1, dtype=bool)
+    return np.any((d2 < limit) & earlier, axis=1)
+
+
+### every pair (i < j) of spheres that overlap, found by sorting them into cells of the
+### largest diameter and only comparing the 27 neighbouring cells: no O(N^2) pairwise test
+def overlapping_pairs(positions, radii):
+    if len(positions) < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    cells = np.floor(positions / (2.0 * radii.max())).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    dims = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+
+    # the own cell plus the 13 "forward" neighbours see every pair of cells exactly once
+    first, second = [], []
+    for offset in product((-1, 0, 1), repeat=3):
+        if offset < (0, 0, 0):
+            continue
+        near_keys = keys + (offset[0] * dims[1] + offset[1]) * dims[2] + offset[2]
+        lo = np.searchsorted(sorted_keys, near_keys, side='left')
+        n = np.searchsorted(sorted_keys, near_keys, side='right') - lo
+        i = np.repeat(np.arange(len(positions)), n)
+        j = order[np.repeat(lo, n) + np.arange(len(i)) - np.repeat(np.cumsum(n) - n, n)]
+        if offset == (0, 0, 0):
+            keep = i < j
+            i, j = i[keep], j[keep]
+        d2 = np.sum((positions[i] - positions[j]) ** 2, axis=1)
+        hit = d2 < (radii[i] + radii[j]) ** 2
+        first.append(np.minimum(i[hit], j[hit]))
+        second.append(np.maximum(i[hit], j[hit]))
+    return np.concatenate(first), np.concatenate(second)
+
+
+### push overlapping spheres apart along the ground and drop them back onto it, a few rounds;
+### returns the relaxed positions and a mask of the seeds to keep (later seed of a pair still touching goes)
+def relax_overlaps(positions, radii, drop_points, iterations=8):
+    positions = positions.copy()
+    moved = np.zeros(len(positions), dtype=bool)
+    for _ in range(iterations):
+        i, j = overlapping_pairs(positions, radii)
+        if not len(i):
+            break
+        # split every overlap between both seeds, sideways only
+        delta = positions[j] - positions[i]
+        delta[:, 1] = 0.0
+        dist = np.linalg.norm(delta, axis=1)
+        angle = i * 2.399963  # stacked seeds get spread along a golden-angle direction
+        fallback = np.stack([np.cos(angle), np.zeros(len(i)), np.sin(angle)], axis=1)
+        direction = np.where(dist[:, None] > 1e-9, delta / np.maximum(dist, 1e-9)[:, None], fallback)
+        push = 0.5 * (radii[i] + radii[j] - np.linalg.norm(positions[j] - positions[i], axis=1)) * 1.01
+        offset = np.zeros_like(positions)
+        np.add.at(offset, i, -direction * push[:, None])
+        np.add.at(offset, j, direction * push[:, None])
+
+        # seeds pushed off the ground stay where they were
+        touched = np.unique(np.concatenate([i, j]))
+        xz = positions[touched][:, [0, 2]] + offset[touched][:, [0, 2]]
+        hit, dropped, _ = drop_points(xz)
+        positions[touched[hit]] = dropped
+        moved[touched[hit]] = True
+
+    keep = np.ones(len(positions), dtype=bool)
+    keep[overlapping_pairs(positions, radii)[1]] = False
+    return positions, keep, moved
+
+
+### Bridson-style dart throwing on the surface: candidates are drawn in vectorized batches
+### and rejected against the hash grid, radii holds one radius per prototype.
+### Pass an existing grid to keep adding to an earlier scatter.
+def poisson_disk_sample(sampler, count, radii, rng, grid=None, max_tries=30):
+    radii = np.asarray(radii, dtype=np.float64)
+    if grid is None:
+        grid = SpatialHashGrid(2.0 * radii.max())
+    positions, normals, proto_ids = [], [], []
+    accepted = 0
+    tries = 0
+    rate = 1.0
+    while accepted < count and tries < max_tries * count:
+        # grow the batch as the surface fills up so each batch has ~256 survivors
+        batch = int(min(65536, max(256, 256 / rate)))
+        tries += batch
+        points, nrm = sampler.sample(batch, rng)
+        protos = rng.integers(0, len(radii), batch)
+        rad = radii[protos]
+
+        keep = ~grid.collides(points, rad)
+        rate = max(keep.mean(), 1e-4)
+        points, nrm, protos, rad = points[keep], nrm[keep], protos[keep], rad[keep]
+        keep = ~batch_conflicts(points, rad)
+        points, nrm, protos, rad = points[keep], nrm[keep], protos[keep], rad[keep]
+
+        room = count - accepted
+        fits = grid.insert(points[:room], rad[:room])
+        positions.append(points[:room][fits])
+        normals.append(nrm[:room][fits])
+        proto_ids.append(protos[:room][fits])
+        accepted += int(fits.sum())
+
+    if not positions:
+        return np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0, dtype=np.int64)
+    return np.concatenate(positions), np.concatenate(normals), np.concatenate(proto_ids)
+
+
+### footprint radius of an object on the ground plane (half the XZ diagonal)
+def seed_radius(obj):
+    min_x, min_y, min_z, max_x, max_y, max_z = cmds.exactWorldBoundingBox(obj)
+    return 0.5 * float(np.hypot(max_x - min_x, max_z - min_z))
+
+
+### bounding sphere radius of an object (half the bounding box diagonal)
+def seed_bounding_radius(obj):
+    min_x, min_y, min_z, max_x, max_y, max_z = cmds.exactWorldBoundingBox(obj)
+    return 0.5 * float(np.linalg.norm([max_x - min_x, max_y - min_y, max_z - min_z]))
+
+
+### one instancer node that draws every prototype, the seeds only live in its point arrays
+def create_instancer(name, prototypes):
+    node = cmds.createNode('instancer', name=name)
+    for i, src in enumerate(prototypes):
+        cmds.connectAttr(src + '.matrix', f'{node}.inputHierarchy[{i}]', f=True)
+    cmds.setAttr(node + '.rotationAngleUnits', 0)  # degrees
+    return node
+
+
+### push position / rotation / scale / prototype index arrays into the instancer in one setMObject
+def write_instancer_points(node, positions, rotations, scales, proto_ids):
+    data = om.MFnArrayAttrsData()
+    data_obj = data.create()
+    for attr, values in (('position', positions), ('rotation', rotations), ('scale', scales)):
+        data.vectorArray(attr).copy(om.MVectorArray([om.MVector(*v) for v in values.tolist()]))
+    data.doubleArray('objectIndex').copy(om.MDoubleArray(proto_ids.astype(np.float64).tolist()))
+
+    sel = om.MSelectionList()
+    sel.add(node)
+    plug = om.MFnDependencyNode(sel.getDependNode(0)).findPlug('inputPoints', False)
+    plug.setMObject(data_obj)
+
+
+### write one transform attribute (translate / rotate / scale) for many nodes at once:
+### values go out as batched MEL setAttr chunks inside a single undo chunk, viewport paused
+def write_transforms(nodes, attr, values, chunk_size=2000):
+    start = time.perf_counter()
+    values = np.broadcast_to(np.asarray(values, dtype=np.float64), (len(nodes), 3)).tolist()
+    cmds.undoInfo(openChunk=True, chunkName=f'SeedPlanter_{attr}')
+    cmds.refresh(suspend=True)
+    try:
+        for begin in range(0, len(nodes), chunk_size):
+            chunk = zip(nodes[begin:begin + chunk_size], values[begin:begin + chunk_size])
+            mel.eval(''.join(f'setAttr "{node}.{attr}" {x!r} {y!r} {z!r};' for node, (x, y, z) in chunk))
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+    return time.perf_counter() - start
+
+
+### write a scatter into an uncompressed .npz, so it can be streamed back member by member
+def save_scatter_cache(path, positions, rotations, scales, proto_ids, prototypes, fingerprint, seed, rng_state):
+    np.savez(path,
+             positions=positions, rotations=rotations, scales=scales, proto_ids=proto_ids,
+             prototypes=np.array(prototypes, dtype=str), fingerprint=np.array(fingerprint),
+             seed=np.array(seed), rng_state=np.array(json.dumps(rng_state)))
+
+
+### read one array of an open .npz straight into its final buffer, chunk_bytes at a time,
+### so large layouts never sit in memory twice
+def read_npz_array(zf, name, chunk_bytes=1 << 22):
+    with zf.open(name + '.npy') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        array = np.empty(shape, dtype=dtype, order='F' if fortran_order else 'C')
+        buffer = memoryview(array.reshape(-1, order='A').view(np.uint8))
+        for start in range(0, len(buffer), chunk_bytes):
+            f.readinto(buffer[start:start + chunk_bytes])
+    return array
+
+
+### load every array of a scatter cache, returns a dict like np.load would
+def load_scatter_cache(path):
+    cache = {}
+    with zipfile.ZipFile(path) as zf:
+        for member in zf.namelist():
+            name = member[:-len('.npy')]
+            cache[name] = read_npz_array(zf, name)
+    return cache
+
 
 class CreateBuildingsUI:
+    # seeds are drawn from the random stream in blocks of this size whatever the timed chunk is,
+    # so a seed and a count always give the same layout on any machine
+    sample_block = 1000
+    # seed array snapshots kept for undo / redo, older undo steps leave the arrays as they are
+    undo_snapshots = 20
+
     def __init__(self):
         # create empty node for grouping and delete constrain later
         self.ground = None
         self.seed_objects = []
         self.instances = []
+        self.sampler = None
+        self.instancer = None
+        self.grid = None
+        self.rng = None
+        self.scatter_key = None
         self.seed_group = "seed_group"
+
+        # every seed lives in these arrays, nodes or the instancer are just the output
+        self.positions = np.zeros((0, 3))
+        self.rotations = np.zeros((0, 3))
+        self.scales = np.zeros((0, 3))
+        self.proto_ids = np.zeros(0, dtype=np.int64)
         
         cmds.createNode('transform', n='const_group')
         
@@ -29,6 +652,11 @@ class CreateBuildingsUI:
         if cmds.objExists(self.seed_group):
             cmds.delete(self.seed_group)
         cmds.group(em=True, name=self.seed_group)
+        # edit counter, undo / redo bring its value back with the nodes (see undo_step)
+        cmds.addAttr(self.seed_group, longName='seedPlanterStep', attributeType='long', defaultValue=0)
+        self.step = 0
+        self.undo_depth = 0
+        self.snapshots = {0: self.state()}
         
         # if window exist, delete it
         if cmds.window('BuildingToolUI', exists=True):
@@ -51,8 +679,25 @@ class CreateBuildingsUI:
 
         cmds.separator(h=8)
         self.num_field = cmds.intFieldGrp(label='Instances:', value1=20)
+        self.seed_field = cmds.intFieldGrp(label='Random Seed (0 = new):', value1=0)
+        self.align_check = cmds.checkBox(label='Align to Surface Normal', value=False)
+        self.mode_menu = cmds.optionMenu(label='Scatter Mode')
+        cmds.menuItem(label='Random')
+        cmds.menuItem(label='Blue Noise')
+        cmds.menuItem(label='Density Map')
+        cmds.menuItem(label='Drop (Top-Down)')
+        cmds.menuItem(label='No Overlap')
+        self.density_field = cmds.textFieldButtonGrp(label='Density Map', buttonLabel='...',
+                                                     bc=self.browse_density_map)
+        self.spacing_field = cmds.floatFieldGrp(label='Spacing (x seed size)', value1=1.0)
+        self.output_menu = cmds.optionMenu(label='Output')
+        cmds.menuItem(label='Transforms')
+        cmds.menuItem(label='Instancer')
 
         cmds.button(label='Create Instances', bgc=(0.4, 0.8, 0.6), h=30, c=self.create_instances)
+        cmds.button(label='Reseed (Full Rebuild)', c=self.reseed)
+        cmds.button(label='Save Scatter Cache', c=self.save_cache)
+        cmds.button(label='Load Scatter Cache', c=self.load_cache)
         
         self.x_scale_slider = cmds.floatSliderGrp(label='X Scale', field=True, min=0.1, max=5.0, value=1.0)
         self.y_scale_slider = cmds.floatSliderGrp(label='Y Scale', field=True, min=0.1, max=5.0, value=1.0)
@@ -63,17 +708,22 @@ class CreateBuildingsUI:
         cmds.button(label='Apply Rotation', c=self.rotate)
 
         cmds.button(label='Random Collapse', bgc=(1, 0.6, 0.3), c=self.collapse)
+        cmds.button(label='Bake Instancer to Transforms', c=self.bake)
+        self.status_label = cmds.text(label='', align='left')
 
         cmds.separator(h=8)
         cmds.button(label='Clear Instances', bgc=(1, 0.3, 0.3), c=self.clear)
 
         cmds.showWindow(self.win)
+        cmds.scriptJob(event=['Undo', self.sync_undo], parent=self.win)
+        cmds.scriptJob(event=['Redo', self.sync_undo], parent=self.win)
     
     ### define surface
     def set_ground(self, *_):
         sel = cmds.ls(sl=True)
         if sel:
             self.ground = sel[0]
+            self.sampler = None
             cmds.text(self.ground_label, e=True, label=f'Ground: {self.ground}')
         else:
             cmds.warning("Please select a ground object.")
@@ -92,57 +742,437 @@ class CreateBuildingsUI:
             cmds.warning("No ground object set.")
             return
 
-        # Clear previous
-        self.clear()
+        with self.undo_step('plant'):
+            # Pull the ground triangles once, then sample every seed in one pass.
+            # A ground edited since then gets a new sampler and all seeds are planted again
+            if self.sampler is None or self.sampler.ground != self.ground or not self.sampler.is_current():
+                self.sampler = SurfaceSampler(self.ground)
+                self.scatter_key = None
 
-        # Get size of ground
-        bound = cmds.exactWorldBoundingBox(self.ground)
-        min_x, min_y, min_z, max_x, max_y, max_z = bound
-        range_x = max_x - min_x
-        range_z = max_z - min_z
-        range_y = max_y - min_y
-        
-        for i in range(count):
+            # Settings changed: rebuild. Same settings: only add or remove the difference
+            seed = self.resolve_seed()
+            key = self.scatter_settings()
+            if key != self.scatter_key:
+                self.clear()
+                self.scatter_key = key
+            if self.rng is None:
+                self.rng = np.random.default_rng(seed)
+
+            current = len(self.positions)
+            if count < current:
+                self.remove_seeds(count)
+            elif count > current:
+                self.add_seeds(count - current)
+    ### pick the greyscale image that drives Density Map mode
+    def browse_density_map(self, *_):
+        path = cmds.fileDialog2(fileFilter='Images (*.png *.jpg *.jpeg *.tif *.tiff *.exr *.tga)', fileMode=1,
+                                caption='Pick Density Map')
+        if path:
+            cmds.textFieldButtonGrp(self.density_field, e=True, text=path[0])
+    ### start a new random stream and rebuild every seed
+    def reseed(self, *_):
+        cmds.intFieldGrp(self.seed_field, e=True, value1=0)
+        self.create_instances()
+    ### the seed in the UI, a fresh one is picked (and shown) when it is 0
+    def resolve_seed(self):
+        seed = cmds.intFieldGrp(self.seed_field, q=True, value1=True)
+        if not seed:
+            seed = int(np.random.SeedSequence().entropy % (2 ** 31 - 1)) + 1
+            cmds.intFieldGrp(self.seed_field, e=True, value1=seed)
+        return seed
+    ### everything that makes existing placements invalid when it changes
+    def scatter_settings(self):
+        return (self.ground, tuple(self.seed_objects),
+                cmds.intFieldGrp(self.seed_field, q=True, value1=True),
+                cmds.textFieldButtonGrp(self.density_field, q=True, text=True),
+                cmds.optionMenu(self.mode_menu, q=True, value=True),
+                cmds.floatFieldGrp(self.spacing_field, q=True, value1=True),
+                cmds.checkBox(self.align_check, q=True, value=True),
+                cmds.optionMenu(self.output_menu, q=True, value=True))
+    ### sample count more seeds from the running random stream and append them, with progress
+    def add_seeds(self, count):
+        mode = cmds.optionMenu(self.mode_menu, q=True, value=True)
+        if mode == 'Density Map' and not os.path.isfile(cmds.textFieldButtonGrp(self.density_field, q=True, text=True)):
+            cmds.warning("Please pick a density map image.")
+            return
+
+        # drive the pipeline chunk by chunk, sizing chunks so each one takes about a quarter second
+        steps = self.scatter_steps(count)
+        next(steps)
+        chunk = 100
+        done = 0
+        before = len(self.positions)
+        cancelled = False
+        start = time.perf_counter()
+        cmds.progressWindow(title='Planting Seeds', progress=0, maxValue=count, isInterruptable=True,
+                            status=f'0 / {count} seeds (Esc to stop)')
+        try:
+            while True:
+                chunk_start = time.perf_counter()
+                try:
+                    done = steps.send(chunk)
+                except StopIteration:
+                    break
+                elapsed = max(time.perf_counter() - chunk_start, 1e-4)
+                chunk = int(np.clip(chunk * 0.25 / elapsed, 10, 20000))
+                cmds.progressWindow(e=True, progress=done, status=f'{done} / {count} seeds (Esc to stop)')
+                if cmds.progressWindow(q=True, isCancelled=True):
+                    cancelled = True
+                    break
+        finally:
+            steps.close()
+            cmds.progressWindow(endProgress=True)
+            if cmds.optionMenu(self.output_menu, q=True, value=True) == 'Instancer':
+                self.update_instancer()
+            elif len(self.instances) < len(self.positions):
+                # stopped between a sampled block and its nodes, drop the seeds without nodes
+                self.remove_seeds(len(self.instances))
+
+        # whatever got planted is a complete, consistent scatter
+        done = len(self.positions) - before
+        if done < count:
+            cmds.intFieldGrp(self.num_field, e=True, value1=len(self.positions))
+            if not cancelled:
+                cmds.warning(f"Only {done} of {count} new seeds could be placed in {mode} mode.")
+        label = f'{"Stopped" if cancelled else "Planted"} {done} seeds in {time.perf_counter() - start:.3f} s'
+        if mode == 'Drop (Top-Down)':
+            bvh = self.sampler.bvh()
+            label += f' (BVH build {bvh.build_time:.3f} s, last drop {bvh.query_time:.3f} s)'
+        cmds.text(self.status_label, e=True, label=label)
+    ### scatter pipeline: sample -> project -> create -> parent, one chunk per step.
+    ### Send the next chunk size in, get the number of seeds done so far back.
+    ### Only node creation follows the chunk size, sampling always runs in fixed blocks.
+    def scatter_steps(self, count):
+        align = cmds.checkBox(self.align_check, q=True, value=True)
+        instancer = cmds.optionMenu(self.output_menu, q=True, value=True) == 'Instancer'
+        base = len(self.positions)
+        sampled = 0
+        done = 0
+        chunk = yield done
+        while done < count:
+            target = min(done + chunk, count)
+            while sampled < target:
+                size = min(self.sample_block, count - sampled)
+                positions, normals, proto_ids = self.sample_seeds(size)
+                rotations = normals_to_rotations(normals) if align else np.zeros((len(positions), 3))
+                self.positions = np.concatenate([self.positions, positions])
+                self.rotations = np.concatenate([self.rotations, rotations])
+                self.scales = np.concatenate([self.scales, np.ones((len(positions), 3))])
+                self.proto_ids = np.concatenate([self.proto_ids, proto_ids])
+                sampled += len(positions)
+                # a short block means the ground is full or the samples keep missing
+                if len(positions) < size:
+                    count = sampled
+                    break
+            target = min(target, sampled)
+            if not instancer:
+                self.instances += self.create_nodes(base + done, base + target, align)
+            done = target
+            if done >= count:
+                return
+            chunk = yield done
+    ### draw count new seeds with the current scatter mode
+    def sample_seeds(self, count):
+        mode = cmds.optionMenu(self.mode_menu, q=True, value=True)
+        if mode in ('Blue Noise', 'No Overlap'):
+            # every source keeps its own radius, so big buildings get more room
+            radii = self.grid_radii()
+            if self.grid is None:
+                self.rebuild_grid(radii)
+            return poisson_disk_sample(self.sampler, count, radii, self.rng, self.grid)
+        if mode == 'Density Map':
+            path = cmds.textFieldButtonGrp(self.density_field, q=True, text=True)
+            positions, normals = self.sampler.sample_density(load_density_map(path), count, self.rng)
+        elif mode == 'Drop (Top-Down)':
+            positions, normals = self.sampler.sample_drop(count, self.rng)
+        else:
+            positions, normals = self.sampler.sample(count, self.rng)
+        proto_ids = self.rng.integers(0, max(len(self.seed_objects), 1), len(positions))
+        return positions, normals, proto_ids
+    ### drop the seeds past count, nodes and arrays alike
+    def remove_seeds(self, count):
+        stale = [inst for inst in self.instances[count:] if cmds.objExists(inst)]
+        if stale:
+            cmds.delete(stale)
+        self.instances = self.instances[:count]
+        self.positions = self.positions[:count]
+        self.rotations = self.rotations[:count]
+        self.scales = self.scales[:count]
+        self.proto_ids = self.proto_ids[:count]
+        if self.grid is not None:
+            self.grid.truncate(count)
+        if self.instancer:
+            self.update_instancer()
+    ### hash grid of the current seeds, so Blue Noise / No Overlap additions keep away from them
+    def rebuild_grid(self, radii):
+        seed_radii = self.scaled_radii(radii)
+        self.grid = SpatialHashGrid(2.0 * max(radii.max(), seed_radii.max(initial=0.0)))
+        fits = self.grid.insert(self.positions, seed_radii)
+        if not fits.all():
+            # grid ids have to stay equal to seed indices, remove_seeds truncates by index
+            self.grid = None
+            raise RuntimeError(f"Hash grid rejected {int((~fits).sum())} placed seeds.")
+    ### radius of every placed seed: its source radius grown by its largest scale
+    def scaled_radii(self, radii):
+        return radii[self.proto_ids] * np.abs(self.scales).max(axis=1, initial=0.0)
+    ### per source radius for the current mode: footprint x spacing, or full bounding sphere
+    def grid_radii(self):
+        if cmds.optionMenu(self.mode_menu, q=True, value=True) == 'No Overlap':
             if self.seed_objects:
-                src = random.choice(self.seed_objects)
+                return np.array([seed_bounding_radius(src) for src in self.seed_objects])
+            return np.array([0.5 * np.sqrt(6.0)])
+        spacing = cmds.floatFieldGrp(self.spacing_field, q=True, value1=True)
+        return np.array(self.seed_radii()) * spacing
+    ### after scaling, relax seeds that now overlap and remove the ones that still do
+    def resolve_overlaps(self):
+        start = time.perf_counter()
+        radii = self.scaled_radii(self.grid_radii())
+        positions, keep, moved = relax_overlaps(self.positions, radii, self.sampler.drop_points)
+        self.positions = positions
+        removed = int((~keep).sum())
+        if removed:
+            stale = [inst for inst, k in zip(self.instances, keep) if not k and cmds.objExists(inst)]
+            if stale:
+                cmds.delete(stale)
+            self.instances = [inst for inst, k in zip(self.instances, keep) if k]
+            self.positions = self.positions[keep]
+            self.rotations = self.rotations[keep]
+            self.scales = self.scales[keep]
+            self.proto_ids = self.proto_ids[keep]
+            moved = moved[keep]
+            cmds.intFieldGrp(self.num_field, e=True, value1=len(self.positions))
+        self.rebuild_grid(self.grid_radii())
+
+        if self.instancer:
+            self.update_instancer()
+        elif moved.any():
+            write_transforms([inst for inst, m in zip(self.instances, moved) if m], 'translate',
+                             self.positions[moved])
+        cmds.text(self.status_label, e=True,
+                  label=f'No Overlap: moved {int(moved.sum())}, removed {removed} seeds '
+                        f'in {time.perf_counter() - start:.3f} s')
+    ### write the current scatter to a .npz cache
+    def save_cache(self, *_):
+        if not len(self.positions) or self.sampler is None:
+            cmds.warning("Nothing to save, create instances first.")
+            return
+        path = cmds.fileDialog2(fileFilter='Scatter Cache (*.npz)', fileMode=0, caption='Save Scatter Cache')
+        if not path:
+            return
+        prototypes = self.seed_objects or ['building_proto']
+        save_scatter_cache(path[0], self.positions, self.rotations, self.scales, self.proto_ids, prototypes,
+                           self.sampler.fingerprint, cmds.intFieldGrp(self.seed_field, q=True, value1=True),
+                           self.rng.bit_generator.state)
+        cmds.text(self.status_label, e=True, label=f'Saved {len(self.positions)} seeds to {path[0]}')
+    ### re-apply a saved scatter without resampling
+    def load_cache(self, *_):
+        path = cmds.fileDialog2(fileFilter='Scatter Cache (*.npz)', fileMode=1, caption='Load Scatter Cache')
+        if not path:
+            return
+        if not self.ground:
+            cmds.warning("No ground object set.")
+            return
+        start = time.perf_counter()
+        cache = load_scatter_cache(path[0])
+
+        if self.sampler is None or self.sampler.ground != self.ground or not self.sampler.is_current():
+            self.sampler = SurfaceSampler(self.ground)
+        if str(cache['fingerprint']) != self.sampler.fingerprint:
+            cmds.warning("Scatter cache was made on a different ground shape, seeds may float or sink.")
+        prototypes = [str(name) for name in cache['prototypes']]
+        if prototypes == ['building_proto']:
+            self.seed_objects = []
+        elif len(self.seed_objects) != len(prototypes):
+            # fall back to the seed objects the cache was made with
+            if not all(cmds.objExists(name) for name in prototypes):
+                cmds.warning("Seed objects stored in the cache are missing from the scene.")
+                return
+            self.seed_objects = prototypes
+        cmds.text(self.seed_label, e=True, label=f'Seeds: {", ".join(self.seed_objects) or "None"}')
+
+        with self.undo_step('load'):
+            self.clear()
+            cmds.intFieldGrp(self.seed_field, e=True, value1=int(cache['seed']))
+            cmds.intFieldGrp(self.num_field, e=True, value1=len(cache['positions']))
+            self.positions = cache['positions']
+            self.rotations = cache['rotations']
+            self.scales = cache['scales']
+            self.proto_ids = cache['proto_ids']
+            self.scatter_key = self.scatter_settings()
+
+            # carry on the saved random stream, so adding seeds later continues the layout
+            self.rng = np.random.default_rng()
+            self.rng.bit_generator.state = json.loads(str(cache['rng_state']))
+            if cmds.optionMenu(self.mode_menu, q=True, value=True) in ('Blue Noise', 'No Overlap'):
+                self.rebuild_grid(self.grid_radii())
+
+            if cmds.optionMenu(self.output_menu, q=True, value=True) == 'Instancer':
+                self.update_instancer()
+            else:
+                self.instances = self.create_nodes(0, len(self.positions))
+                write_transforms(self.instances, 'scale', self.scales)
+            cmds.text(self.status_label, e=True,
+                      label=f'Loaded {len(self.positions)} seeds in {time.perf_counter() - start:.3f} s')
+    ### node creation is the only per-seed cost left
+    def create_nodes(self, start, stop, align=True):
+        nodes = []
+        for i in range(start, stop):
+            if self.seed_objects:
+                src = self.seed_objects[self.proto_ids[i]]
                 inst = cmds.instance(src, name=f'inst_{i}')[0]
             else:
                 inst = cmds.polyCube(name=f'building_{i}', w=1, h=2, d=1)[0]
 
-            x = random.uniform(min_x, max_x)
-            z = random.uniform(min_z, max_z)
-            cmds.move(x, 0, z, inst)
-            cmds.parent(inst, self.seed_group)
-            self.instances.append(inst)
+            cmds.xform(inst, ws=True, t=self.positions[i].tolist())
+            if align:
+                cmds.xform(inst, ws=True, ro=self.rotations[i].tolist())
+            nodes.append(inst)
 
-            if self.ground:
-                const = cmds.geometryConstraint(self.ground, inst, w=1)
-                cmds.delete(const)  # only snap once
+        if nodes:
+            nodes = cmds.parent(nodes, self.seed_group)
+        return nodes
+    ### create the instancer on first use, then rewrite its point arrays
+    def update_instancer(self):
+        if not self.instancer or not cmds.objExists(self.instancer):
+            prototypes = self.seed_objects
+            if not prototypes:
+                proto = cmds.polyCube(name='building_proto', w=1, h=2, d=1)[0]
+                cmds.hide(proto)
+                prototypes = cmds.parent(proto, self.seed_group)
+            self.instancer = create_instancer('seed_instancer', prototypes)
+            self.instancer = cmds.parent(self.instancer, self.seed_group)[0]
+        write_instancer_points(self.instancer, self.positions, self.rotations, self.scales, self.proto_ids)
+    ### turn the instancer points into real transforms, only when asked for
+    def bake(self, *_):
+        if not self.instancer or not cmds.objExists(self.instancer):
+            cmds.warning("No instancer to bake.")
+            return
+        with self.undo_step('bake'):
+            cmds.delete(self.instancer)
+            self.instancer = None
+            if cmds.objExists('building_proto'):
+                cmds.delete('building_proto')
+            self.instances = self.create_nodes(0, len(self.positions))
+            write_transforms(self.instances, 'scale', self.scales)
+            # the scatter is transforms now, so count changes and edits keep working on the baked nodes
+            cmds.optionMenu(self.output_menu, e=True, value='Transforms')
+            self.scatter_key = self.scatter_settings()
+    ### footprint radius of every seed source (default cube is 1 x 1)
+    def seed_radii(self):
+        if self.seed_objects:
+            return [seed_radius(src) for src in self.seed_objects]
+        return [0.5 * np.sqrt(2.0)]
     ### scale all seeds
     def scale(self, *_):
-        x_scale_value = cmds.floatSliderGrp(self.x_scale_slider, q=True, value=True)
-        y_scale_value = cmds.floatSliderGrp(self.y_scale_slider, q=True, value=True)
-        z_scale_value = cmds.floatSliderGrp(self.z_scale_slider, q=True, value=True)
-        for inst in self.instances:
-            cmds.scale(x_scale_value, y_scale_value, z_scale_value, inst)
+        with self.undo_step('scale'):
+            x_scale_value = cmds.floatSliderGrp(self.x_scale_slider, q=True, value=True)
+            y_scale_value = cmds.floatSliderGrp(self.y_scale_slider, q=True, value=True)
+            z_scale_value = cmds.floatSliderGrp(self.z_scale_slider, q=True, value=True)
+            # new arrays, never edited in place, so undo snapshots can keep the old ones
+            scale_value = np.array([x_scale_value, y_scale_value, z_scale_value], dtype=np.float64)
+            self.scales = np.tile(scale_value, (len(self.positions), 1))
+            self.apply_transforms('scale', self.scales, 'Scaled')
+            if len(self.positions) and cmds.optionMenu(self.mode_menu, q=True, value=True) == 'No Overlap':
+                self.resolve_overlaps()
     ### random rotate
     def rotate(self, *_):
-        x, y, z = cmds.floatFieldGrp(self.rot_fields, q=True, value=True)
-        for inst in self.instances:
-            cmds.rotate(x, y, z, inst)
-    ### random collapse
+        with self.undo_step('rotate'):
+            x, y, z = cmds.floatFieldGrp(self.rot_fields, q=True, value=True)
+            self.rotations = np.tile(np.array([x, y, z], dtype=np.float64), (len(self.positions), 1))
+            self.apply_transforms('rotate', self.rotations, 'Rotated')
+    ### random collapse, all random rotations are drawn as one array
     def collapse(self, *_):
-        for inst in self.instances:
-            rx = random.uniform(-180, 180)
-            ry = random.uniform(-180, 180)
-            rz = random.uniform(-180, 180)
-            cmds.rotate(rx, ry, rz, inst)
+        with self.undo_step('collapse'):
+            if self.rng is None:
+                self.rng = np.random.default_rng(self.resolve_seed())
+            self.rotations = self.rng.uniform(-180, 180, (len(self.positions), 3))
+            self.apply_transforms('rotate', self.rotations, 'Collapsed')
+    ### send the edited arrays to the instancer or to every transform in one go, report timing
+    def apply_transforms(self, attr, values, verb):
+        start = time.perf_counter()
+        if self.instancer:
+            self.update_instancer()
+            count = len(self.positions)
+        else:
+            write_transforms(self.instances, attr, values)
+            count = len(self.instances)
+        cmds.text(self.status_label, e=True, label=f'{verb} {count} seeds in {time.perf_counter() - start:.3f} s')
             
+    ### everything undo / redo has to put back; the arrays are replaced, never edited in place,
+    ### so a snapshot only keeps references
+    def state(self):
+        return (self.positions, self.rotations, self.scales, self.proto_ids, list(self.instances), self.instancer,
+                self.scatter_key, None if self.rng is None else self.rng.bit_generator.state)
+    ### put a snapshot back after Maya's undo / redo restored the nodes
+    def restore_state(self, state):
+        (self.positions, self.rotations, self.scales, self.proto_ids, instances, self.instancer,
+         self.scatter_key, rng_state) = state
+        self.instances = list(instances)
+        self.rng = None
+        if rng_state is not None:
+            self.rng = np.random.default_rng()
+            self.rng.bit_generator.state = rng_state
+        # the hash grid is rebuilt from the arrays the next time seeds are added
+        self.grid = None
+        cmds.intFieldGrp(self.num_field, e=True, value1=len(self.positions))
+        if self.scatter_key:
+            cmds.optionMenu(self.output_menu, e=True, value=self.scatter_key[-1])
+        if self.instancer and cmds.objExists(self.instancer):
+            # setMObject on the instancer is not tracked by undo, its points are written again here
+            write_instancer_points(self.instancer, self.positions, self.rotations, self.scales, self.proto_ids)
+    ### one undo step per edit: the seed group's step counter is set inside the same chunk as the
+    ### node edits, so after an undo / redo its value names the snapshot that goes with the nodes
+    @contextmanager
+    def undo_step(self, name):
+        self.undo_depth += 1
+        if self.undo_depth == 1:
+            cmds.undoInfo(openChunk=True, chunkName=f'SeedPlanter_{name}')
+        try:
+            yield
+        finally:
+            self.undo_depth -= 1
+            if not self.undo_depth:
+                try:
+                    plug = self.seed_group + '.seedPlanterStep'
+                    if cmds.objExists(plug):
+                        self.step = cmds.getAttr(plug) + 1
+                        cmds.setAttr(plug, self.step)
+                        self.snapshots[self.step] = self.state()
+                        for old in [step for step in self.snapshots if step <= self.step - self.undo_snapshots]:
+                            del self.snapshots[old]
+                finally:
+                    cmds.undoInfo(closeChunk=True)
+    ### Undo / Redo script job: when the step counter moved, bring back the arrays of that step
+    def sync_undo(self):
+        plug = self.seed_group + '.seedPlanterStep'
+        if not cmds.objExists(plug):
+            return
+        step = cmds.getAttr(plug)
+        if step == self.step:
+            return
+        self.step = step
+        if step in self.snapshots:
+            self.restore_state(self.snapshots[step])
+        else:
+            cmds.warning("Undo went past the kept seed snapshots, the seed arrays no longer match the scene.")
     ### delete constrains, use after all are done
     def clear(self, *_):
-        for inst in self.instances:
-            if cmds.objExists(inst):
-                cmds.delete(inst)
-        self.instances = []
+        with self.undo_step('clear'):
+            for inst in self.instances:
+                if cmds.objExists(inst):
+                    cmds.delete(inst)
+            self.instances = []
+            if self.instancer and cmds.objExists(self.instancer):
+                cmds.delete(self.instancer)
+            self.instancer = None
+            if cmds.objExists('building_proto'):
+                cmds.delete('building_proto')
+            self.positions = np.zeros((0, 3))
+            self.rotations = np.zeros((0, 3))
+            self.scales = np.zeros((0, 3))
+            self.proto_ids = np.zeros(0, dtype=np.int64)
+            self.grid = None
+            self.rng = None
+            self.scatter_key = None
 
 CreateBuildingsUI()
\ No newline at end of file
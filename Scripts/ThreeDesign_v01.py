@@ -3,15 +3,25 @@
 # Author: Arrow Lyu
 # Date: 2019/06/26
 # Description: Maya Tool - UI for generating three design patterns:
-#              - Phyllotactic (spiral) pattern of spheres
+#              - Phyllotactic (spiral) pattern of spheres, as NURBS nodes or one combined mesh
 #              - Circle pattern of curves
 #              - Square pattern of NURBS squares
+#              The layouts are computed as NumPy arrays (no Maya needed), a thin writer
+#              then creates all nodes of a pattern in bulk.
 # Usage:
 #   - Run the script in Maya to open a window with three designs.
 # ================================
 
-import maya.cmds as cmds
 import math as math
+import numpy as np
+import time
+try:
+    import maya.cmds as cmds
+    import maya.mel as mel
+    import maya.api.OpenMaya as om
+except ImportError:
+    # the pattern engine runs without Maya, e.g. to benchmark or test the layouts
+    cmds = mel = om = None
 
 
 # create main window
@@ -22,6 +32,8 @@ def ui():
     win=cmds.window('Three Design')
     # center the layout
     cmds.columnLayout(adj=True)
+    # keep an existing pattern group and only move, add or delete its nodes
+    cmds.checkBox('regenerate1', label='Regenerate In Place (reuse existing pattern nodes)', value=False)
     
     # content for the first design Phtllotactic pattern
     cmds.separator(height=20)
@@ -34,6 +46,7 @@ def ui():
     cmds.textField('radius1', h=30)
     cmds.text('Put the space between your sphere(Recommend 4):')
     cmds.textField('cspread1', h=30)
+    cmds.checkBox('combined1', label='One Combined Mesh (fast for thousands of spheres)', value=False)
     cmds.button('Phtllotactic Design', h=40, c='drawPhyllotacticPattern()', bgc=[0.5,0.1,0.2])
     
     # content for the second design circle Pattern
@@ -61,80 +74,211 @@ def ui():
     
 ###################################################################################################
 '''
-1. create 3 designs
+1. pattern engine: every layout is (positions, rotations, scales) arrays, no Maya calls
 '''
-# a function that makes a Phtllotactic Pattern
+# Phtllotactic (Vogel spiral) layout of t unit spheres scaled to radius
 # t=how many sphere you want, radius=radius of sphere, cspread=space between spheres
+def phyllotacticLayout(t, radius, cspread, xcenter=0.0, ycenter=0.0):
+    phi = 137.508 * ( math.pi / 180.0 )
+    n = np.arange(t)
+    r = cspread * np.sqrt(n)
+    theta = n * phi
+    positions = np.stack([r * np.cos(theta) + xcenter, np.zeros(t), r * np.sin(theta) + ycenter], axis=1)
+    return positions, np.zeros((t, 3)), np.full(t, float(radius))
+
+# circle layout: two unit circles per degree, mirrored on the y and -y side, growing by 0.01
+# circleDegree=the degree those circle spread
+def circleLayout(circleDegree):
+    i = np.arange(circleDegree)
+    radian = i / 180.0 * math.pi
+    side = np.stack([np.cos(radian), np.sin(radian), i * 0.01], axis=1)
+    # y side and -y side circles alternate, same order as they used to be drawn
+    positions = np.stack([side, -side], axis=1).reshape(-1, 3)
+    return positions, np.zeros((2 * circleDegree, 3)), np.repeat(1 + i * 0.01, 2)
+
+# square layout: unit squares growing by 0.01, turning 5 degrees each, bobbing along z
+# numSquare=the number of squares, size=size of the center square
+def squareLayout(numSquare, size):
+    i = np.arange(numSquare)
+    positions = np.stack([np.zeros(numSquare), np.zeros(numSquare), 2 * np.sin(i)], axis=1)
+    rotations = np.stack([np.zeros(numSquare), np.zeros(numSquare), 5.0 * i], axis=1)
+    return positions, rotations, size * 0.1 + i * 0.01
+
+# time every layout for growing counts, runs without Maya
+def benchmarkLayouts(counts=(1000, 100000, 1000000)):
+    for count in counts:
+        for name, layout in (('phyllotactic', lambda: phyllotacticLayout(count, 4, 4)),
+                             ('circle', lambda: circleLayout(count // 2)),
+                             ('square', lambda: squareLayout(count, 2))):
+            start = time.perf_counter()
+            layout()
+            print(f'{name} {count}: {time.perf_counter() - start:.4f} s')
+
+###################################################################################################
+'''
+2. Maya writer: one template node, duplicated in bulk, transforms set in batched chunks
+'''
+# count copies of template (template included), each duplicate call doubles the set
+def bulkDuplicate(template, count):
+    if count <= 0:
+        cmds.delete(template)
+        return []
+    nodes = cmds.ls(template, long=True)
+    while len(nodes) < count:
+        # duplicate also lists the children of grouped templates (nurbsSquare), keep the roots
+        nodes += cmds.ls(cmds.duplicate(nodes[:count - len(nodes)], rr=True), assemblies=True, long=True)
+    return nodes
+
+# translate / rotate / uniform scale for many nodes as batched MEL setAttr, one undo chunk
+def writeTransforms(nodes, positions, rotations, scales, chunkSize=2000):
+    values = np.hstack([positions, rotations, np.repeat(np.asarray(scales, dtype=np.float64)[:, None], 3, axis=1)]).tolist()
+    cmds.undoInfo(openChunk=True, chunkName='ThreeDesign_transforms')
+    cmds.refresh(suspend=True)
+    try:
+        for begin in range(0, len(nodes), chunkSize):
+            chunk = zip(nodes[begin:begin + chunkSize], values[begin:begin + chunkSize])
+            mel.eval(''.join(f'setAttr "{node}.t" {v[0]!r} {v[1]!r} {v[2]!r}; setAttr "{node}.r" {v[3]!r} {v[4]!r} {v[5]!r}; '
+                             f'setAttr "{node}.s" {v[6]!r} {v[7]!r} {v[8]!r};' for node, v in chunk))
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+
+# a pattern group with one node per layout entry, makeTemplate builds the unit node to copy
+# regenerate reuses the nodes of an existing groupName and only creates or deletes the difference
+def writePattern(groupName, makeTemplate, positions, rotations, scales, regenerate=False):
+    count = len(positions)
+    group = groupName if regenerate and cmds.objExists(groupName) else None
+    # a combined mesh of the same name has no nodes to reuse
+    if group and cmds.listRelatives(group, shapes=True):
+        cmds.delete(group)
+        group = None
+    if group is None:
+        group = cmds.createNode("transform", name=groupName)
+    nodes = cmds.listRelatives(group, children=True, type='transform', fullPath=True) or []
+    if len(nodes) > count:
+        cmds.delete(nodes[count:])
+        nodes = nodes[:count]
+    if nodes and len(nodes) < count:
+        # copies of existing children stay in the group, each call doubles the set
+        while len(nodes) < count:
+            cmds.duplicate(nodes[:count - len(nodes)], rr=True)
+            nodes = cmds.listRelatives(group, children=True, type='transform', fullPath=True)
+    elif len(nodes) < count:
+        # put the whole pattern in a group with one call
+        cmds.parent(bulkDuplicate(makeTemplate(), count), group)
+        nodes = cmds.listRelatives(group, children=True, type='transform', fullPath=True)
+    if nodes:
+        writeTransforms(nodes, positions, rotations, scales)
+    return group
+
+# regenerate mode from the UI
+def regenerateChecked():
+    return cmds.checkBox('regenerate1', q=True, value=True)
+
+###################################################################################################
+'''
+3. create 3 designs
+'''
+# a function that makes a Phtllotactic Pattern
 def drawPhyllotacticPattern():
     # assign variables
     radius=int(cmds.textField('radius1', q=True, text=True))
     cspread=int(cmds.textField('cspread1', q=True, text=True))
     t=int(cmds.textField('t1', q=True, text=True))
-    angle = 137.508
-    phi = angle * ( math.pi / 180.0 ) 
-    xcenter = 0.0
-    ycenter = 0.0
-    # create group node
-    design1grp=cmds.createNode("transform", name='Phtllotactic_Pattern')
-    # for loops iterate from the first value until < 4 
-    for n in range(t): 
-        r = cspread * math.sqrt(n) 
-        theta = n * phi 
-        # equation for transform x and z                  
-        x = r * math.cos(theta) + xcenter 
-        y = r * math.sin(theta) + ycenter       
-        # draw sphere  
-        drawSphere = cmds.sphere(r=radius)[0]
-        cmds.xform(drawSphere, t=(x,0,y))
-        # put the whole pattern in a group
-        cmds.parent(drawSphere, design1grp)
+    if cmds.checkBox('combined1', q=True, value=True):
+        return phyllotacticMesh(t, radius, cspread, regenerate=regenerateChecked())
+    return phyllotacticSpheres(t, radius, cspread, regenerate=regenerateChecked())
+
+# one NURBS sphere node per point
+def phyllotacticSpheres(t, radius, cspread, regenerate=False):
+    return writePattern('Phtllotactic_Pattern', lambda: cmds.sphere(r=1)[0], *phyllotacticLayout(t, radius, cspread), regenerate=regenerate)
+
+# every sphere in one polygon mesh: the template sphere's vertices offset per point, created in one call
+# regenerate moves the points of an existing mesh with the same sphere count instead
+def phyllotacticMesh(t, radius, cspread, subdivisions=(16, 12), regenerate=False):
+    # read the unit template sphere once, then throw it away
+    template = cmds.polySphere(r=1, sx=subdivisions[0], sy=subdivisions[1], ch=False)[0]
+    sel = om.MSelectionList()
+    sel.add(template)
+    fn = om.MFnMesh(sel.getDagPath(0))
+    points = np.array(fn.getPoints(om.MSpace.kObject))
+    counts, connects = (np.array(a, dtype=np.int64) for a in fn.getVertices())
+    us, vs = (np.array(a) for a in fn.getUVs())
+    uv_counts, uv_ids = (np.array(a, dtype=np.int64) for a in fn.getAssignedUVs())
+    cmds.delete(template)
+
+    # tile the template, vertex and uv ids shift by one template per sphere
+    positions, _, scales = phyllotacticLayout(t, radius, cspread)
+    all_points = (points[None, :, :3] * scales[:, None, None] + positions[:, None, :]).reshape(-1, 3)
+    all_points = np.hstack([all_points, np.ones((len(all_points), 1))])
+    if regenerate and cmds.objExists('Phtllotactic_Pattern'):
+        if cmds.listRelatives('Phtllotactic_Pattern', shapes=True, type='mesh'):
+            sel = om.MSelectionList()
+            sel.add('Phtllotactic_Pattern')
+            old_fn = om.MFnMesh(sel.getDagPath(0).extendToShape())
+            if old_fn.numVertices == len(all_points):
+                old_fn.setPoints(om.MPointArray(all_points.tolist()), om.MSpace.kObject)
+                return 'Phtllotactic_Pattern'
+        cmds.delete('Phtllotactic_Pattern')
+    shift = np.arange(t)[:, None]
+    all_connects = (connects[None, :] + shift * len(points)).ravel()
+    all_uv_ids = (uv_ids[None, :] + shift * len(us)).ravel()
+
+    mesh_fn = om.MFnMesh()
+    mesh = mesh_fn.create(om.MPointArray(all_points.tolist()), np.tile(counts, t).tolist(), all_connects.tolist())
+    mesh_fn.setUVs(np.tile(us, t).tolist(), np.tile(vs, t).tolist())
+    mesh_fn.assignUVs(np.tile(uv_counts, t).tolist(), all_uv_ids.tolist())
+    design1grp = cmds.rename(om.MFnDagNode(mesh).fullPathName(), 'Phtllotactic_Pattern')
+    cmds.sets(design1grp, e=True, forceElement='initialShadingGroup')
+    return design1grp
+
+# time NURBS nodes against the combined mesh for growing t, e.g. benchmarkPhyllotactic()
+# the node path is skipped past nodeLimit, it takes minutes there
+def benchmarkPhyllotactic(counts=(300, 1000, 5000, 20000), radius=4, cspread=4, nodeLimit=5000):
+    for t in counts:
+        report = f'{t} spheres:'
+        if t <= nodeLimit:
+            start = time.perf_counter()
+            cmds.delete(phyllotacticSpheres(t, radius, cspread))
+            report += f' {t} NURBS nodes {time.perf_counter() - start:.3f} s,'
+        start = time.perf_counter()
+        cmds.delete(phyllotacticMesh(t, radius, cspread))
+        report += f' 1 combined mesh {time.perf_counter() - start:.3f} s'
+        print(report)
         
 ###################################################################################################
 # a function that draws a circle pattern
-# circleDegree=the degree those circle spread 
 def CirclePattern():
     # assign variables
     circleDegree=int(cmds.textField('circleDegree1', q=True, text=True))
-    # create group node
-    design2grp=cmds.createNode("transform", name='Circle_Pattern')
-    #cmds.createNode("transform", name='Circle_Pattern2')
-    # a loop to rotate and scale circles
-    for i in range(circleDegree):
-        degree=i
-        # equation to draw a circle
-        radian=i/180.0*math.pi
-        x=math.cos(radian)
-        y=math.sin(radian)
-        z=i*0.01
-        # draw circles on y axis side
-        drawCircle1=cmds.circle(r=1+i*0.01)[0]
-        cmds.xform(drawCircle1, t=(x,y,z))
-        # put circles in a group
-        cmds.parent(drawCircle1, design2grp)
-        # draw circles on -y axis side
-        drawCircle2=cmds.circle(r=1+i*0.01)[0]
-        cmds.xform(drawCircle2, t=(-x,-y,-z))
-        # put circles in a second group
-        cmds.parent(drawCircle2, design2grp)
+    return writePattern('Circle_Pattern', lambda: cmds.circle(r=1)[0], *circleLayout(circleDegree), regenerate=regenerateChecked())
 
 ###################################################################################################
 # a function that draws a square pattern
-# numSquare=the number of squares, size=size of the center square
 def SquarePattern():
     # assign variables
     numSquare=int(cmds.textField('numSquare1', q=True, text=True))
     size=int(cmds.textField('size1', q=True, text=True))
-    # create group node
-    design3grp=cmds.createNode("transform", name='Square_Pattern')
-    # a loop to rotate and scale squares
-    for i in range(numSquare):
-        z=2*math.sin(i)
-        drawSquare=cmds.nurbsSquare(sl1=size*0.1+i*0.01, sl2=size*0.1+i*0.01)[0]
-        cmds.xform(drawSquare, r=True, ro=(0,0,5*i), t=(0,0,z))
-        # put squares in a group
-        cmds.parent(drawSquare, design3grp)
+    return writePattern('Square_Pattern', lambda: cmds.nurbsSquare(sl1=1, sl2=1)[0], *squareLayout(numSquare, size), regenerate=regenerateChecked())
+
+# time a full rebuild against regenerating in place after a tweak, e.g. benchmarkRegenerate()
+def benchmarkRegenerate(count=10000, size=2):
+    if cmds.objExists('Square_Pattern'):
+        cmds.delete('Square_Pattern')
+    start = time.perf_counter()
+    writePattern('Square_Pattern', lambda: cmds.nurbsSquare(sl1=1, sl2=1)[0], *squareLayout(count, size))
+    rebuild = time.perf_counter() - start
+    start = time.perf_counter()
+    writePattern('Square_Pattern', None, *squareLayout(count, size + 1), regenerate=True)
+    tweak = time.perf_counter() - start
+    start = time.perf_counter()
+    writePattern('Square_Pattern', None, *squareLayout(count + count // 10, size + 1), regenerate=True)
+    grow = time.perf_counter() - start
+    cmds.delete('Square_Pattern')
+    print(f'{count} squares: rebuild {rebuild:.3f} s, regenerate {tweak:.3f} s, regenerate +10% {grow:.3f} s')
 
 
 ###################################################################################################
 # call functions
-ui()
\ No newline at end of file
+if cmds is not None:
+    ui()